@@ -18,15 +18,166 @@
 Actor Class for jinxes library
 """
 
+import itertools
 import uuid
 
+from jinxes import sprite
 
-class Actor(object):
+
+_sequence = itertools.count()
+# NOTE(vish): sort keys are z * SEQUENCE_SPAN + seq, so actors are
+#             ordered by z and then by creation
+SEQUENCE_SPAN = 2 ** 32
+
+
+class Drawable(object):
+    """Frame, ordering and visibility logic shared by Actor and Particle.
+
+    The cells an actor collides with are its opaque cells dilated by
+    COLLISION_KERNEL, a tuple of (x, y) offsets.  Subclasses can set it
+    to sprite.PLUS_KERNEL, for example, to also collide with the cells
+    next to them.  The resulting masks are cached per frame.
+
+    Actors are drawn in order of sort_key, an integer combining z with
+    a creation sequence number.  It is kept up to date when z changes.
+
+    If retire_margin is set the app destroys the actor once it has
+    moved entirely off screen by more than the margin, given as a
+    fraction of the screen size or as a (left, top, right, bottom)
+    tuple of them.
+    """
+    __slots__ = ()
+    COLLISION_KERNEL = sprite.IDENTITY_KERNEL
+    retire_margin = None
+
+    def __cmp__(self, other):
+        if not other:
+            return -1
+        return cmp(self.sort_key, other.sort_key)
+
+    def _get_z(self):
+        return self._z
+
+    def _set_z(self, value):
+        # NOTE(vish): the location cache is ordered by sort_key so the
+        #             actor has to be taken out before the key changes
+        indexed = hasattr(self, '_visible')
+        if indexed:
+            self.app.notify_reordering(self)
+        self._z = value
+        self.sort_key = value * SEQUENCE_SPAN + self.seq
+        if indexed:
+            self.app.notify_reordered(self)
+
+    z = property(_get_z, _set_z)
+
+    @property
+    def frame(self):
+        return int(self._frame)
+
+    @property
+    def compiled_frame(self):
+        """The sprite.Frame for the current frame."""
+        return self._frames[self.frame]
+
+    @property
+    def opaque(self):
+        """Offsets of the non-null cells in the current frame."""
+        return self._frames[self.frame].opaque
+
+    @property
+    def collision_mask(self):
+        """Offsets relative to screenx, screeny used for collisions."""
+        return self._frames[self.frame].mask(self.COLLISION_KERNEL)
+
+    @property
+    def collision_set(self):
+        """collision_mask as a frozenset for membership tests."""
+        return self._frames[self.frame].mask_set(self.COLLISION_KERNEL)
+
+    @property
+    def bounds(self):
+        """Bounding box of the opaque cells relative to screenx, screeny."""
+        return self._frames[self.frame].mask_bounds(sprite.IDENTITY_KERNEL)
+
+    @property
+    def collision_bounds(self):
+        """Bounding box of collision_mask or None if it is empty."""
+        return self._frames[self.frame].mask_bounds(self.COLLISION_KERNEL)
+
+    def covers(self, x, y):
+        """Return True if the offset x, y is an opaque cell."""
+        return self._frames[self.frame].covers(x, y)
+
+    def get_ch(self, x, y):
+        ch = self._frames[self.frame].get(x, y)
+        if ch is None:
+            return ('\0', None, None, self.inverted)
+        return ch
+
+    def _get_visible(self):
+        return self._visible
+
+    def _set_visible(self, value):
+        if value != getattr(self, '_visible', None):
+            self._visible = value
+            self.app.notify_visible(self)
+
+    visible = property(_get_visible, _set_visible)
+
+    def collisions(self, x=None, y=None):
+        """Returns a set of coordinates to check for collisions.
+
+        We optionally pass x and y to support checking collisions
+        on potential locations.  This is built from collision_mask,
+        which is what Application.try_move uses; set COLLISION_KERNEL
+        rather than overriding this to change the shape."""
+        if x is None:
+            x = self.screenx
+        if y is None:
+            y = self.screeny
+        return set((x + xoffset, y + yoffset)
+                   for xoffset, yoffset in self.collision_mask)
+
+    def destroy(self):
+        self.app.notify_destroyed(self)
+        if self.group is not None:
+            self.group.remove(self)
+
+    def _overrides_get_ch(self):
+        # NOTE(vish): subclasses that override get_ch may draw something
+        #             other than their compiled frames
+        return type(self).get_ch.im_func is not Drawable.get_ch.im_func
+
+
+class Actor(Drawable):
+    """Something drawn on the screen.
+
+    display is compiled into frames with fg, bg and inverted unless it
+    is a sprite.Sprite, whose frames are shared as they are.
+
+    Actors added to a jinxes.group.ActorGroup are moved by the group
+    instead of ticking; see ActorGroup.
+
+    An actor that ends a tick without velocity, and that did not have
+    to be moved back on screen, goes to sleep: the app stops ticking
+    it, and so it stops probing for collisions, until its velocity,
+    frame rate, display or location is set.  If it is animated its
+    next frame change is put on app.scheduler instead.  Anything moving
+    into a sleeping actor still collides with it.  Subclasses that
+    override tick never sleep.
+    """
 
     def __init__(self, app, x, y, display, current=None,
                  fg=None, bg=None, inverted=False, z=0):
         self.id = unicode(uuid.uuid4())
+        self.seq = next(_sequence)
+        self.custom_get_ch = self._overrides_get_ch()
         self.app = app
+        self.group = None
+        self.index = None
+        self.sleeping = False
+        self.frame_event = None
         self._frame = 0.0
         self.fg = fg
         self.bg = bg
@@ -45,53 +196,23 @@ class Actor(object):
         self.updated = current
         self.visible = True
 
-    def __cmp__(self, other):
-        if not other:
-            return -1
-        result = cmp(self.z, other.z)
-        if result:
-            return result
-        return cmp(self.id, other.id)
-
-    @property
-    def frame(self):
-        return int(self._frame)
-
     def _get_display(self):
-        frame = self._display[self.frame]
-        out = []
-        for line in frame:
-            out.append([char[0] for char in line])
-        return out
+        return self._frames[self.frame].lines()
 
     def _set_display(self, display):
-        if not isinstance(display, list):
-            display = [display]
-        self._display = []
-        for frame in display:
-            if isinstance(frame, basestring):
-                frame = frame.split('\n')
-            outframe = []
-            for line in frame:
-                outline = []
-                for char in line:
-                    if len(char) == 1:
-                        char = (char, self.fg, self.bg, self.inverted)
-                    outline.append(char)
-                outframe.append(outline)
-            self._display.append(outframe)
-        self.frames = len(self._display)
-        self.hsize = max(len(line) for line in self._display[0])
-        self.vsize = len(self._display[0])
+        self.shared_frames = isinstance(display, sprite.Sprite)
+        if self.shared_frames:
+            self._frames = display
+        else:
+            self._frames = sprite.compile_frames(display, self.fg, self.bg,
+                                                 self.inverted)
+        self.frames = len(self._frames)
+        self.hsize = self._frames[0].width
+        self.vsize = self._frames[0].height
+        self.wake()
 
     display = property(_get_display, _set_display)
 
-    def get_ch(self, x, y):
-        try:
-            return self._display[self.frame][y][x]
-        except IndexError:
-            return ('\0', None, None, self.inverted)
-
     def tick(self, current, delta):
         oldframe = self.frame
         newframe = self._frame + delta * self.frame_rate
@@ -104,7 +225,72 @@ class Actor(object):
         newx = self.x + delta * self.xvel
         newy = self.y + delta * self.yvel
         self.move(current, newx, newy)
+        if (not self._xvel and not self._yvel and
+            (self.frames == 1 or self._frame_rate >= 0) and
+            self._x == newx and self._y == newy and
+            type(self).tick.im_func is Actor.tick.im_func):
+            self.app.notify_sleeping(self)
+            if self.frames > 1 and self._frame_rate:
+                self._schedule_frame(current)
+
+    def _schedule_frame(self, current):
+        """Schedule the next frame change of a sleeping actor."""
+        self.frame_time = current
+        remaining = int(self._frame) + 1 - self._frame
+        due = current + remaining / self._frame_rate
+        self.frame_event = self.app.scheduler.schedule(due, self._next_frame)
+
+    def _next_frame(self, current):
+        self.frame_event = None
+        elapsed = current - self.frame_time
+        newframe = self._frame + elapsed * self._frame_rate
+        # NOTE(vish): always advance so rounding can't reschedule the same
+        #             frame change forever
+        newframe = max(newframe, int(self._frame) + 1)
+        while newframe >= self.frames:
+            newframe -= self.frames
+        self.animate(current, newframe)
+        self._schedule_frame(current)
+
+    def wake(self):
+        """Put a sleeping actor back in the per-frame tick loop."""
+        if self.frame_event is not None:
+            self.app.scheduler.cancel(self.frame_event)
+            self.frame_event = None
+        if self.sleeping:
+            self.app.notify_waking(self)
+
+    def destroy(self):
+        if self.frame_event is not None:
+            self.app.scheduler.cancel(self.frame_event)
+            self.frame_event = None
+        super(Actor, self).destroy()
+
+    def update_cells(self, current, x, y, lines, frame=None):
+        """Overwrite part of a frame in place starting at offset x, y.
 
+        lines are compiled like display with this actor's colors and
+        are clipped to the frame.  frame defaults to the one shown.  If
+        only the characters or colors change just the cells written are
+        redrawn.  Frames shared through a sprite.Sprite are copied the
+        first time one is changed.
+        """
+        if self.shared_frames:
+            self._frames = [f.copy() for f in self._frames]
+            self.shared_frames = False
+        shown = frame is None or frame == self.frame
+        target = self._frames[self.frame if frame is None else frame]
+        written, reshaped = target.update(x, y, lines, self.fg, self.bg,
+                                          self.inverted)
+        if not shown or not written:
+            return
+        if reshaped:
+            self.app.notify_animating(self)
+            self.updated = current
+            self.app.notify_animated(self)
+        else:
+            self._updated = current
+            self.app.notify_cells_updated(self, written)
 
     def animate(self, current, frame):
         self.app.notify_animating(self)
@@ -114,28 +300,23 @@ class Actor(object):
 
     def move(self, current, x, y):
         x, y = self.app.try_move(self, current, x, y)
-        screenx = self.app.project_x(x, self.hsize)
-        screeny = self.app.project_y(y, self.vsize)
+        self.place(current, x, y, self.app.project_x(x, self.hsize),
+                   self.app.project_y(y, self.vsize))
+
+    def place(self, current, x, y, screenx, screeny):
+        """Set the location to x, y which projects to screenx, screeny."""
         if self.screenx != screenx or self.screeny != screeny:
-                self.app.notify_moving(self)
-                self.x = x
-                self.y = y
-                self.moved = current
-                self.updated = current
-                self.app.notify_moved(self)
+            self.app.notify_moving(self)
+            self._x = x
+            self._y = y
+            self.screenx = screenx
+            self.screeny = screeny
+            self.moved = current
+            self.updated = current
+            self.app.notify_moved(self)
         else:
-            self.x = x
-            self.y = y
-
-    def _get_visible(self):
-        return self._visible
-
-    def _set_visible(self, value):
-        if value != getattr(self, '_visible', None):
-            self._visible = value
-            self.app.notify_visible(self)
-
-    visible = property(_get_visible, _set_visible)
+            self._x = x
+            self._y = y
 
     def _get_updated(self):
         return self._updated
@@ -152,6 +333,7 @@ class Actor(object):
     def _set_x(self, value):
         self._x = value
         self.screenx = self.app.project_x(self._x, self.hsize)
+        self.wake()
 
     x = property(_get_x, _set_x)
 
@@ -161,24 +343,140 @@ class Actor(object):
     def _set_y(self, value):
         self._y = value
         self.screeny = self.app.project_y(self._y, self.vsize)
+        self.wake()
 
     y = property(_get_y, _set_y)
 
-    def collisions(self, x=None, y=None):
-        """Returns a set of coordinates to check for collisions.
+    def _get_xvel(self):
+        return self._xvel
 
-        We optionally pass x and y to support checking collisions
-        on potential locations"""
-        if x is None:
-            x = self.screenx
-        if y is None:
-            y = self.screeny
-        coords = []
-        for xoffset in xrange(self.hsize):
-            for yoffset in xrange(self.vsize):
-                if ord(self.get_ch(xoffset, yoffset)[0]):
-                    coords.append((x + xoffset, y + yoffset))
-        return set(coords)
+    def _set_xvel(self, value):
+        self._xvel = value
+        self.wake()
 
-    def destroy(self):
-        self.app.notify_destroyed(self)
+    xvel = property(_get_xvel, _set_xvel)
+
+    def _get_yvel(self):
+        return self._yvel
+
+    def _set_yvel(self, value):
+        self._yvel = value
+        self.wake()
+
+    yvel = property(_get_yvel, _set_yvel)
+
+    def _get_frame_rate(self):
+        return self._frame_rate
+
+    def _set_frame_rate(self, value):
+        self._frame_rate = value
+        self.wake()
+
+    frame_rate = property(_get_frame_rate, _set_frame_rate)
+
+
+class Particle(Drawable):
+    """A lightweight actor for drawing many simple sprites.
+
+    Particles use __slots__ instead of an instance dict, take integer
+    ids from the sequence counter instead of a uuid, and draw frames
+    compiled once with sprite.compile_frames or jinxes.assets and
+    shared between them.
+
+    x, y and the frame phase are plain attributes.  Changing them does
+    nothing until commit is called, which projects the particle and
+    updates the location cache once, and only if its cell or frame
+    changed.  tick moves, animates and commits.  Particles neither
+    bounce nor collide unless bordered or collides is set.
+    """
+    __slots__ = ('id', 'seq', 'sort_key', '_z', 'app', 'group', '_frames',
+                 'frames', 'hsize', 'vsize', '_frame', 'shown_frame', 'x',
+                 'y', 'screenx', 'screeny', 'xvel', 'yvel', 'frame_rate',
+                 'bordered', 'collides', 'transparent', 'inverted',
+                 'custom_get_ch', 'updated', '_visible', 'sleeping',
+                 'retire_margin', 'index')
+
+    def __init__(self, app, x, y, frames, current=None, z=0):
+        self.id = self.seq = next(_sequence)
+        self.custom_get_ch = self._overrides_get_ch()
+        self.app = app
+        self.group = None
+        self.index = None
+        self.sleeping = False
+        self._frames = frames
+        self.frames = len(frames)
+        self.hsize = frames[0].width
+        self.vsize = frames[0].height
+        self._frame = 0.0
+        self.shown_frame = 0
+        self.x = x
+        self.y = y
+        self.screenx = app.project_x(x, self.hsize)
+        self.screeny = app.project_y(y, self.vsize)
+        self.xvel = 0.0
+        self.yvel = 0.0
+        self.frame_rate = 30.0
+        self.bordered = False
+        self.collides = False
+        self.transparent = False
+        self.inverted = False
+        self.retire_margin = None
+        self.updated = current
+        self.z = z
+        app.notify_created(self)
+        self.visible = True
+
+    @property
+    def frame(self):
+        return self.shown_frame
+
+    def tick(self, current, delta):
+        frame = self._frame + delta * self.frame_rate
+        while frame >= self.frames:
+            frame -= self.frames
+        self._frame = frame
+        x = self.x + delta * self.xvel
+        y = self.y + delta * self.yvel
+        if self.bordered or self.collides:
+            x, y = self.app.try_move(self, current, x, y)
+        self.x = x
+        self.y = y
+        self.commit(current)
+
+    def animate(self, current, frame):
+        self._frame = frame
+
+    def move(self, current, x, y):
+        self.x, self.y = self.app.try_move(self, current, x, y)
+        self.commit(current)
+
+    def place(self, current, x, y, screenx, screeny):
+        """Set the location to x, y which projects to screenx, screeny."""
+        self.x = x
+        self.y = y
+        self.commit(current, screenx, screeny)
+
+    def commit(self, current, screenx=None, screeny=None):
+        """Show the current location and frame on screen."""
+        app = self.app
+        if screenx is None:
+            screenx = app.project_x(self.x, self.hsize)
+            screeny = app.project_y(self.y, self.vsize)
+        frame = int(self._frame)
+        if (screenx == self.screenx and screeny == self.screeny and
+            frame == self.shown_frame):
+            return
+        if self._visible:
+            app.notify_moving(self)
+        self.screenx = screenx
+        self.screeny = screeny
+        self.shown_frame = frame
+        self.updated = current
+        if self._visible:
+            app.notify_updated(self)
+
+    def touch(self, current):
+        """Redraw the particle, e.g. when get_ch changes its colors."""
+        self.updated = current
+        if self._visible:
+            self.app.notify_updated(self)
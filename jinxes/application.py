@@ -19,11 +19,25 @@ Application classes for the jinxes library
 """
 
 
+import collections
 import curses
 import locale
 import logging
+import operator
+import Queue
+import random
+import select
+import sys
+import threading
 import time
 
+from jinxes import metrics
+from jinxes import palette
+from jinxes import scheduler
+from jinxes import spatial
+
+EMPTY = frozenset()
+
 
 def run(application_class):
     """Run a jinxes application subclass."""
@@ -40,24 +54,80 @@ class Application(object):
     """Interactive Curses Application Class
 
     Abstracts and simplifies curses related calls for input and
-    output processing.
+    output processing.  All curses module calls go through backend,
+    which defaults to the curses module itself.  Pass a
+    jinxes.screen.VirtualBackend to run without a terminal.
+
+    The main loop reads the time from clock and apps should draw
+    random numbers from self.random, reseeding it with self.seed, so
+    that runs can be replayed exactly.
+
+    If FPS (or the fps argument) is set the loop sleeps between frames
+    until the next frame is due or input arrives instead of spinning.
+
+    Events scheduled on self.scheduler for a time run just before the
+    tick of the first frame at or after that time.
+
+    COMPOSITOR can be set to a class such as
+    jinxes.compositor.NumpyCompositor which is created with the app on
+    initialize and used by redraw instead of per-cell get_location.
+
+    When the terminal is resized the app is fitted to the new size once
+    no resize has come for RESIZE_DELAY seconds; see resize.
+
+    If THREADED (or the threaded argument) is set, input handlers, tick
+    and compositing run on a worker thread once the app is initialized.
+    The thread that started the app reads input for it and draws the
+    snapshots of composited cells it hands over, at most SNAPSHOTS of
+    them queued.
+
+    enable_metrics starts timing and counting the work done each frame,
+    see jinxes.metrics.  Reports are appended to METRICS_PATH as json
+    if it is set.
     """
     DEFAULT_FG_COLOR = 4
     DEFAULT_BG_COLOR = 16
     BG_CHAR = ' '
-
-    def __init__(self, scr):
+    FPS = None
+    COMPOSITOR = None
+    METRICS_PATH = None
+    RESIZE_DELAY = 0.1
+    THREADED = False
+    SNAPSHOTS = 2
+    INPUT_POLL = 0.01
+
+    def __init__(self, scr, backend=None, clock=None, seed=None, fps=None,
+                 threaded=None):
         self.logger = logging.getLogger('jinxes')
-        curses.curs_set(0)
-        self.available_brush_ids = set(xrange(1, curses.COLOR_PAIRS))
-        self.allocated_brush_ids = {}
-        self.brushes = {}
-        self.default_brush = self.get_brush(self.DEFAULT_FG_COLOR,
-                                            self.DEFAULT_BG_COLOR)
+        self.backend = backend or curses
+        self.clock = clock or time.time
+        self.fps = self.FPS if fps is None else fps
+        self.threaded = self.THREADED if threaded is None else threaded
+        self.screen_lock = threading.RLock()
+        self.generation = 0
+        self.frame = 0
+        self.drawn_frame = 0
+        self.inputs = None
+        self.input_ready = None
+        self.snapshots = None
+        self.stopping = False
+        self.failure = None
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.backend.curs_set(0)
+        self.palette = palette.Palette(self.backend)
+        self.default_key = palette.brush_key(self.DEFAULT_FG_COLOR,
+                                             self.DEFAULT_BG_COLOR)
+        self.default_brush = self.palette.pin(self.default_key)
         scr.nodelay(1)
         self.scr = scr
         scr.bkgdset(ord(self.BG_CHAR), self.default_brush)
-        self.actors = {}
+        self.actors = collections.OrderedDict()
+        self.active = collections.OrderedDict()
+        self.groups = []
+        self.scheduler = scheduler.Scheduler()
+        self.metrics = None
+        self.resize_due = None
         self.paused = False
         self.brush_stacks = {}
         self._border = False
@@ -65,6 +135,7 @@ class Application(object):
 
     def notify_created(self, actor):
         self.actors[actor.id] = actor
+        self.active[actor.id] = actor
 
     def notify_destroyed(self, actor):
         self.clear_location_cache(actor)
@@ -72,6 +143,24 @@ class Application(object):
             del self.actors[actor.id]
         except KeyError:
             pass
+        self.active.pop(actor.id, None)
+
+    def notify_sleeping(self, actor):
+        actor.sleeping = True
+        self.active.pop(actor.id, None)
+
+    def notify_waking(self, actor):
+        actor.sleeping = False
+        if actor.id not in self.actors:
+            return
+        active = self.active
+        newest = next(reversed(active), None)
+        active[actor.id] = actor
+        # NOTE(vish): actors tick in creation order, so an actor woken
+        #             behind newer ones is sorted back into place
+        if newest is not None and active[newest].seq > actor.seq:
+            self.active = collections.OrderedDict(
+                sorted(active.iteritems(), key=lambda item: item[1].seq))
 
     def notify_visible(self, actor):
         if actor.visible:
@@ -88,23 +177,85 @@ class Application(object):
     def notify_moved(self, actor):
         pass
 
+    def notify_reordering(self, actor):
+        self._drop_location_cache(actor)
+
+    def notify_reordered(self, actor):
+        if actor.visible:
+            self.set_location_cache(actor)
+
     def notify_animated(self, actor):
         pass
 
     def notify_updated(self, actor):
         self.set_location_cache(actor)
 
+    def notify_cells_updated(self, actor, cells):
+        """Redraw just the given offsets of actor, whose shape is unchanged."""
+        footprint = self.footprints.get(actor.id)
+        if not footprint or actor.id in self.pending_locations:
+            return
+        screenx = actor.screenx
+        screeny = actor.screeny
+        dirty = self.dirty_by_location
+        for x, y in cells:
+            location = (screenx + x, screeny + y)
+            if location in footprint:
+                dirty[location] = True
+
     def initialize(self, current):
+        self._init_screen()
+
+    def _init_screen(self):
+        with self.screen_lock:
+            self._reset_screen()
+
+    def _reset_screen(self):
+        self.generation += 1
         self.height, self.width = self.scr.getmaxyx()
         self.top = 0
         self.left = 0
-        self.actors_by_location = {}
-        for x in xrange(self.width):
-            for y in xrange(self.height):
-                self.actors_by_location[(x, y)] = []
+        self.actors_by_location = spatial.ScreenIndex(self.width,
+                                                      self.height)
+        self.grid = spatial.SpatialGrid()
+        self.footprints = {}
+        self.pending_locations = {}
         self.dirty_by_location = {}
-        self.win = curses.newwin(0, 0, 0, 0)
+        self.win = self.backend.newwin(0, 0, 0, 0)
         self.win.bkgd(ord(self.BG_CHAR), self.default_brush)
+        # NOTE(vish): the front buffer holds the (ch, key) last written
+        #             to each cell, starting with the background that bkgd
+        #             just filled the window with
+        self.front_width = self.width
+        self.compositor = self.COMPOSITOR and self.COMPOSITOR(self)
+        self.front = ([(self.BG_CHAR, self.default_key)] *
+                      (self.width * self.height))
+        self.palette.reset(self.default_key, len(self.front))
+        self.cells_written = 0
+
+    def resize(self, current):
+        """Fit the screen to the terminal, keeping every actor.
+
+        The window, screen index and collision grid are rebuilt for the
+        new size and each actor is projected from its x and y again, so
+        it stays at the same relative spot, apart from the metrics
+        overlay which stays in the corner.  resized is called after.
+        """
+        self._init_screen()
+        if self._border:
+            self.border()
+        for actor in self.actors.values():
+            actor.screenx = self.project_x(actor.x, actor.hsize)
+            actor.screeny = self.project_y(actor.y, actor.vsize)
+            if actor.visible:
+                self.set_location_cache(actor)
+        if self.metrics is not None:
+            self.metrics.resized(current)
+        self.resized(current)
+
+    def resized(self, current):
+        """Called after resize for apps with more to lay out."""
+        pass
 
     def border(self):
         self._border = True
@@ -131,113 +282,257 @@ class Application(object):
 
     def try_move(self, actor, current, floatx, floaty):
         if actor.bordered:
-            halfh = actor.hsize * 0.5 / self.width
-            halfv = actor.vsize * 0.5 / self.height
-            left = 0.0
-            top = 0.0
-            right = 1.0
-            bottom = 1.0
-            if floatx < left + halfh:
-                if actor.xvel:
-                    floatx = (left + halfh) * 2 - floatx
-                    actor.xvel = -actor.xvel
-                else:
-                    floatx = left + halfh
-            elif floatx > right - halfh:
-                if actor.xvel:
-                    floatx = (right - halfh) * 2 - floatx
-                    actor.xvel = -actor.xvel
-                else:
-                    floatx = right - halfh
-            if floaty < top + halfv:
-                if actor.yvel:
-                    floaty = (top + halfv) * 2 - floaty
-                    actor.yvel = -actor.yvel
-                else:
-                    floaty = top + halfv
-            elif floaty > bottom - halfv:
-                if actor.yvel:
-                    floaty = (bottom - halfv) * 2 - floaty
-                    actor.yvel = -actor.yvel
-                else:
-                    floaty = bottom - halfv
+            floatx, floaty = self.bounce(actor, floatx, floaty)
+        if actor.collides:
+            return self.check_collisions(actor, current, floatx, floaty)
+        return floatx, floaty
+
+    def bounce(self, actor, floatx, floaty):
+        """Reflect floatx, floaty and the velocity of actor off the edges.
+
+        Actors without velocity on an axis are clamped instead.
+        """
+        halfh = actor.hsize * 0.5 / self.width
+        halfv = actor.vsize * 0.5 / self.height
+        left = 0.0
+        top = 0.0
+        right = 1.0
+        bottom = 1.0
+        if floatx < left + halfh:
+            if actor.xvel:
+                floatx = (left + halfh) * 2 - floatx
+                actor.xvel = -actor.xvel
+            else:
+                floatx = left + halfh
+        elif floatx > right - halfh:
+            if actor.xvel:
+                floatx = (right - halfh) * 2 - floatx
+                actor.xvel = -actor.xvel
+            else:
+                floatx = right - halfh
+        if floaty < top + halfv:
+            if actor.yvel:
+                floaty = (top + halfv) * 2 - floaty
+                actor.yvel = -actor.yvel
+            else:
+                floaty = top + halfv
+        elif floaty > bottom - halfv:
+            if actor.yvel:
+                floaty = (bottom - halfv) * 2 - floaty
+                actor.yvel = -actor.yvel
+            else:
+                floaty = bottom - halfv
+        return floatx, floaty
+
+    def check_collisions(self, actor, current, floatx, floaty):
+        """Call collide for everything actor would hit at floatx, floaty.
+
+        Returns floatx, floaty or the current location of actor if any
+        collide call refused the move.
+        """
         screenx = self.project_x(floatx, actor.hsize)
         screeny = self.project_y(floaty, actor.vsize)
 
-        if actor.collides:
-            actor_collisions = actor.collisions(screenx, screeny)
-            all_collisions = {}
-            for x, y in actor_collisions:
-                try:
-                    others = self.actors_by_location[(x, y)]
-                except KeyError:
-                    continue
-                for other in others:
-                    if other == actor:
-                        continue
-                    if not other.collides:
-                        continue
-                    all_collisions.setdefault(other, []).append((x, y))
-            for other, collisions in all_collisions.iteritems():
-                if not self.collide(actor, other, current,
-                                    collisions, floatx, floaty):
-                    return actor.x, actor.y
+        bounds = actor.collision_bounds
+        if bounds is None:
+            return floatx, floaty
+        left, top, right, bottom = bounds
+        candidates = [other for other in self.grid.query(
+                          (screenx + left, screeny + top,
+                           screenx + right, screeny + bottom))
+                      if other is not actor and other.collides]
+        if not candidates:
+            return floatx, floaty
+        mask = actor.collision_mask
+        mask_set = actor.collision_set
+        scr_left = self.left
+        scr_top = self.top
+        scr_right = self.left + self.width
+        scr_bottom = self.top + self.height
+        hits = []
+        for other in candidates:
+            ox = other.screenx
+            oy = other.screeny
+            opaque = other.opaque
+            if len(opaque) <= len(mask):
+                dx = ox - screenx
+                dy = oy - screeny
+                cells = [(x + ox, y + oy) for x, y in opaque
+                         if (x + dx, y + dy) in mask_set]
+            else:
+                cells = [(x + screenx, y + screeny) for x, y in mask
+                         if other.covers(x + screenx - ox,
+                                         y + screeny - oy)]
+            cells = [(x, y) for x, y in cells
+                     if scr_left <= x < scr_right and
+                        scr_top <= y < scr_bottom]
+            if cells:
+                x, y = cells[0]
+                hits.append(((y, x, other.sort_key), other, cells))
+        hits.sort(key=lambda hit: hit[0])
+        all_collisions = [(other, cells) for key, other, cells in hits]
+        for other, collisions in all_collisions:
+            if not self.collide(actor, other, current,
+                                collisions, floatx, floaty):
+                return actor.x, actor.y
         return floatx, floaty
 
     def set_location_cache(self, actor):
-        for xoffset in xrange(actor.hsize):
-            for yoffset in xrange(actor.vsize):
-                if ord(actor.get_ch(xoffset, yoffset)[0]):
-                    x = actor.screenx + xoffset
-                    y = actor.screeny + yoffset
-                    if (x >= self.left and x < self.left + self.width
-                        and y >= self.top and y < self.top + self.height):
-                        self.dirty_by_location[(x, y)] = True
-                        if actor not in self.actors_by_location[(x, y)]:
-                            actors = list(self.actors_by_location[(x, y)])
-                            for i, other in enumerate(actors):
-                                if actor < other:
-                                    break
-                            else:
-                                self.actors_by_location[(x, y)].append(actor)
-                                continue
-                            self.actors_by_location[(x, y)].insert(i, actor)
+        """Show actor where it is now once the cache is flushed."""
+        bounds = actor.bounds
+        if actor.collides and bounds is not None:
+            left, top, right, bottom = bounds
+            self.grid.insert(actor, (actor.screenx + left,
+                                     actor.screeny + top,
+                                     actor.screenx + right,
+                                     actor.screeny + bottom))
+        else:
+            self.grid.remove(actor)
+        self.pending_locations[actor.id] = (actor, True)
 
     def clear_location_cache(self, actor):
-        for xoffset in xrange(actor.hsize):
-            for yoffset in xrange(actor.vsize):
-                if ord(actor.get_ch(xoffset, yoffset)[0]):
-                    x = actor.screenx + xoffset
-                    y = actor.screeny + yoffset
-                    if (x >= self.left and x < self.left + self.width
-                        and y >= self.top and y < self.top + self.height):
-                        self.dirty_by_location[(x, y)] = True
-                        if actor in self.actors_by_location[(x, y)]:
-                            self.actors_by_location[(x, y)].remove(actor)
-
-    def get_location(self, x, y):
+        """Hide actor once the cache is flushed."""
+        self.grid.remove(actor)
+        self.pending_locations[actor.id] = (actor, False)
+
+    def flush_location_cache(self):
+        """Apply the location changes queued since the last flush.
+
+        The collision grid is updated immediately, but the cells of an
+        actor are only diffed against the cells it was last indexed at
+        here, once per frame, so an actor that animates and moves in one
+        tick is not cleared and rebuilt several times and cells it
+        covers both before and after are not touched.  All of them are
+        marked dirty since what the actor draws there may have changed.
+        Only the cells inside the screen are indexed, and actors found
+        beyond their retire_margin are destroyed.
+        """
+        pending = self.pending_locations
+        if not pending:
+            return
+        self.pending_locations = {}
+        footprints = self.footprints
+        index = self.actors_by_location
+        dirty = self.dirty_by_location
+        left = self.left
+        top = self.top
+        right = self.left + self.width
+        bottom = self.top + self.height
+        retired = []
+        for actor_id, (actor, shown) in pending.iteritems():
+            old = footprints.pop(actor_id, None) or EMPTY
+            new = EMPTY
+            bounds = actor.bounds if shown else None
+            if bounds is not None:
+                screenx = actor.screenx
+                screeny = actor.screeny
+                bleft = screenx + bounds[0]
+                btop = screeny + bounds[1]
+                bright = screenx + bounds[2]
+                bbottom = screeny + bounds[3]
+                # NOTE(vish): only sprites crossing an edge are clipped
+                #             cell by cell and ones entirely off screen
+                #             are not walked at all
+                if (left <= bleft and bright < right and
+                    top <= btop and bbottom < bottom):
+                    new = frozenset((screenx + xoffset, screeny + yoffset)
+                                    for xoffset, yoffset in actor.opaque)
+                elif (bleft < right and left <= bright and
+                      btop < bottom and top <= bbottom):
+                    xmin = left - screenx
+                    xmax = right - screenx
+                    ymin = top - screeny
+                    ymax = bottom - screeny
+                    new = frozenset((screenx + xoffset, screeny + yoffset)
+                                    for xoffset, yoffset in actor.opaque
+                                    if xmin <= xoffset < xmax and
+                                       ymin <= yoffset < ymax)
+                elif (actor.retire_margin is not None and
+                      self._beyond_margin(actor.retire_margin, bleft, btop,
+                                          bright, bbottom)):
+                    retired.append(actor)
+            if new:
+                footprints[actor_id] = new
+            elif not old:
+                continue
+            for x, y in old - new:
+                index.remove(x, y, actor)
+            for x, y in new - old:
+                index.insert(x, y, actor)
+            dirty.update(dict.fromkeys(old | new, True))
+        for actor in retired:
+            actor.destroy()
+
+    def _beyond_margin(self, margin, bleft, btop, bright, bbottom):
+        """Return True if the box is off screen by more than margin."""
+        if isinstance(margin, tuple):
+            mleft, mtop, mright, mbottom = margin
+        else:
+            mleft = mtop = mright = mbottom = margin
+        return (bright < self.left - mleft * self.width or
+                bbottom < self.top - mtop * self.height or
+                bleft >= self.left + self.width + mright * self.width or
+                btop >= self.top + self.height + mbottom * self.height)
+
+    def _drop_location_cache(self, actor):
+        """Take actor out of the cache now, e.g. before its z changes."""
+        self.pending_locations.pop(actor.id, None)
+        self.grid.remove(actor)
+        old = self.footprints.pop(actor.id, None)
+        if old:
+            index = self.actors_by_location
+            for x, y in old:
+                index.remove(x, y, actor)
+            self.dirty_by_location.update(dict.fromkeys(old, True))
+
+    def get_cell(self, x, y):
+        """Return (utf-8 char, brush key) drawn at x, y.
+
+        When the topmost actor draws the cell by itself the answer comes
+        straight from the cells its compiled frame resolved in advance.
+        """
+        occupants = self.actors_by_location[(x, y)]
+        if occupants:
+            actor = occupants[-1]
+            if not actor.transparent and not actor.custom_get_ch:
+                frame = actor.compiled_frame
+                i = (y - actor.screeny) * frame.width + x - actor.screenx
+                if (len(occupants) == 1 or (frame.fgs[i] is not None and
+                                            frame.bgs[i] is not None)):
+                    return frame.resolved(i, self.DEFAULT_FG_COLOR,
+                                          self.DEFAULT_BG_COLOR)
         ch, fg, bg = None, None, None
-        for actor in reversed(self.actors_by_location[(x, y)]):
-            if actor:
-                x = x - actor.screenx
-                y = y - actor.screeny
-                c, f, b, inv = actor.get_ch(x, y)
-                if inv:
-                    f, b = b, f
-                if ch is None and ord(c) and not actor.transparent:
-                    ch = c.encode('utf-8')
-                if fg is None:
-                    fg = f
-                if bg is None:
-                    bg = b
-                if ch is not None and fg is not None and bg is not None:
-                    break
+        for actor in reversed(occupants):
+            c, f, b, inv = actor.get_ch(x - actor.screenx,
+                                        y - actor.screeny)
+            if inv:
+                f, b = b, f
+            if ch is None and ord(c) and not actor.transparent:
+                ch = c.encode('utf-8')
+            if fg is None:
+                fg = f
+            if bg is None:
+                bg = b
+            if ch is not None and fg is not None and bg is not None:
+                break
 
         ch = ch or self.BG_CHAR
         fg = fg or self.DEFAULT_FG_COLOR
         bg = bg or self.DEFAULT_BG_COLOR
+        return ch, palette.brush_key(fg, bg)
+
+    def get_location(self, x, y):
+        """Return (utf-8 char, fg, bg) drawn at x, y."""
+        self.flush_location_cache()
+        ch, key = self.get_cell(x, y)
+        fg, bg = divmod(key, palette.COLORS)
         return ch, fg, bg
 
+    def composite(self, dirty):
+        """Return (x, y, (ch, key)) for dirty cells in row-major order."""
+        return [(x, y, self.get_cell(x, y))
+                for x, y in sorted(dirty, key=operator.itemgetter(1, 0))]
+
     def collide(self, actor, other, current, collisions, floatx, floaty):
         """Handle collision between actor and other.
 
@@ -246,80 +541,160 @@ class Application(object):
 
     def write(self, x, y, text, fg, bg):
         """Write a text string at location with brush."""
-        brush = self.get_brush(fg, bg)
+        self.write_brush(x, y, text, self.get_brush(fg, bg))
+
+    def write_brush(self, x, y, text, brush):
+        """Write a text string at location with a curses attribute."""
         try:
             self.win.addstr(y, x, text, brush)
-        except curses.error:
+        except self.backend.error:
             if x == self.width - 1 and y == self.height - 1:
                 pass
 
     def get_brush(self, fg_color=None, bg_color=None):
         """Get a brush represented by fg and bg color.
 
-        This brush can be used in further curses calls.  Note that the brush
-        is and will be garbage collected if we run out of brushes and it is
-        no longer needed.
+        This brush can be used in further curses calls.  Note that the
+        color pair behind the brush is reused for other colors once the
+        pairs run out if no cell written by redraw still uses it, so
+        brushes for text written outside of redraw may change color.
         """
         if not fg_color:
             fg_color = self.DEFAULT_FG_COLOR
         if not bg_color:
             bg_color = self.DEFAULT_BG_COLOR
-        str_id = '%s:%s' % (fg_color, bg_color)
-        if not self.brushes.get(str_id):
-            try:
-                int_id = self.available_brush_ids.pop()
-            except KeyError:
-                self._collect_brushes()
-                try:
-                    int_id = self.available_brush_ids.pop()
-                except KeyError:
-                    raise Exception('out of brushes')
-            curses.init_pair(int_id, fg_color, bg_color)
-            brush_id = curses.color_pair(int_id)
-            self.allocated_brush_ids[str_id] = int_id
-            self.brushes[str_id] = brush_id
-        return self.brushes[str_id]
-
-    def _collect_brushes(self):
-        """Reclaim ids for brushes that are no longer being used."""
-        used_brushes = set(['%s:%s' % (self.DEFAULT_FG_COLOR,
-                                       self.DEFAULT_BG_COLOR)])
-        for x in xrange(self.width):
-            for y in xrange(self.height):
-                ch, fg, bg = self.get_location(x, y)
-                used_brushes.add('%s:%s' % (fg, bg))
-        for str_id in self.allocated_brush_ids.keys():
-            if str_id not in used_brushes:
-                int_id = self.allocated_brush_ids[str_id]
-                self.available_brush_ids.append(int_id)
-                del self.allocated_brush_ids[str_id]
-                del self.brushes[str_id]
+        return self.palette.get(palette.brush_key(fg_color, bg_color))
 
     def run(self):
         """Endless processing loop."""
         try:
-            updated = current = time.time()
+            current = self.clock()
             self.initialize(current)
-            while True:
-                self.process_input(current)
-                if not self.paused:
-                    delta = current - updated
-                    self.tick(current, delta)
-                    updated = current
-                self.redraw(current)
-                current = time.time()
+            if self.threaded:
+                self._run_threaded(current)
+            else:
+                self._loop(current)
         except (Exit, KeyboardInterrupt):
             pass
 
+    def _loop(self, current):
+        updated = deadline = current
+        while True:
+            self.frame += 1
+            self.process_input(current)
+            if not self.paused:
+                delta = current - updated
+                self.scheduler.run(current)
+                self.tick(current, delta)
+                updated = current
+            self.redraw(current)
+            current = self.clock()
+            if self.fps:
+                if current < deadline:
+                    self.wait(deadline - current)
+                    current = self.clock()
+                if current >= deadline:
+                    deadline += 1.0 / self.fps
+                    if deadline <= current:
+                        deadline = current + 1.0 / self.fps
+
+    def _run_threaded(self, current):
+        """Simulate on a worker thread and draw its snapshots here.
+
+        This thread only reads input, which is queued for the worker,
+        and draws the snapshots the worker publishes, so a slow tick
+        does not hold up reading keys.  Snapshots composited before the
+        screen was last set up are dropped.
+        """
+        self.inputs = Queue.Queue()
+        self.input_ready = threading.Event()
+        self.snapshots = Queue.Queue(self.SNAPSHOTS)
+        self.stopping = False
+        self.failure = None
+        worker = threading.Thread(target=self._simulate, args=(current,),
+                                  name='jinxes-simulation')
+        worker.daemon = True
+        worker.start()
+        try:
+            while True:
+                with self.screen_lock:
+                    character = self.scr.getch()
+                if character != self.backend.ERR:
+                    self.inputs.put(character)
+                    self.input_ready.set()
+                    continue
+                try:
+                    snapshot = self.snapshots.get(timeout=self.INPUT_POLL)
+                except Queue.Empty:
+                    continue
+                if snapshot is None:
+                    break
+                generation, frame, cells = snapshot
+                with self.screen_lock:
+                    self.drawn_frame = frame
+                    if generation == self.generation:
+                        self.draw(cells)
+        finally:
+            self.stopping = True
+            self.input_ready.set()
+            worker.join()
+        if self.failure:
+            raise self.failure[0], self.failure[1], self.failure[2]
+
+    def _simulate(self, current):
+        try:
+            self._loop(current)
+        except Exit:
+            pass
+        except Exception:
+            self.failure = sys.exc_info()
+        finally:
+            self._hand_off(None)
+
+    def _hand_off(self, snapshot):
+        """Queue snapshot for the drawing thread unless it is stopping."""
+        while not self.stopping:
+            try:
+                self.snapshots.put(snapshot, timeout=self.INPUT_POLL)
+                return True
+            except Queue.Full:
+                pass
+        return False
+
+    def wait(self, timeout):
+        """Sleep for up to timeout seconds or until input is ready."""
+        if self.input_ready is not None:
+            self.input_ready.wait(timeout)
+            self.input_ready.clear()
+            return
+        wait = getattr(self.scr, 'wait', None)
+        if wait:
+            return wait(timeout)
+        try:
+            select.select([sys.stdin], [], [], timeout)
+        except select.error:
+            # NOTE(vish): interrupted by a signal such as SIGWINCH, the
+            #             resize will be picked up by the next getch
+            pass
+
     def process_input(self, current):
         """Input processing."""
-        character = self.scr.getch()
-        if character != curses.ERR:
-            self.process_character(current, character)
+        if self.inputs is None:
+            character = self.scr.getch()
+            if character != self.backend.ERR:
+                self.process_character(current, character)
+        else:
+            if self.stopping:
+                raise Exit()
+            while not self.inputs.empty():
+                self.process_character(current, self.inputs.get())
+        if self.resize_due is not None and current >= self.resize_due:
+            self.resize_due = None
+            self.resize(current)
 
     def process_character(self, current, character):
         """Delegate character to method."""
-        if character == curses.KEY_RESIZE:
+        if character == self.backend.KEY_RESIZE:
             method_name = 'handle_resize'
         else:
             try:
@@ -330,18 +705,119 @@ class Application(object):
         if method:
             method(current)
 
+    def handle_resize(self, current):
+        # NOTE(vish): a terminal being dragged sends a burst of resizes,
+        #             so the resize waits until they stop coming
+        self.resize_due = current + self.RESIZE_DELAY
+
     def tick(self, current, delta):
-        """Do frame actions."""
-        for key in list(self.actors.iterkeys()):
-            actor = self.actors[key]
+        """Do frame actions.
+
+        Groups are stepped and then every actor that is neither asleep
+        nor moved by a group is ticked in creation order.
+        """
+        for group in list(self.groups):
+            group.step(current, delta)
+        for actor in self.active.values():
+            if actor.sleeping or actor.id not in self.actors:
+                continue
             actor.tick(current, delta)
 
     def redraw(self, current):
-        for (x, y) in self.dirty_by_location.iterkeys():
-            ch, fg, bg = self.get_location(x, y)
-            self.write(x, y, ch, fg, bg)
-        if len(self.dirty_by_location):
-            self.dirty_by_location = {}
-            if self._border:
-                self.win.border()
-            self.win.refresh()
+        """Write changed cells to the window and refresh it.
+
+        When threaded the cells are handed to the drawing thread instead,
+        along with the number of the frame they were composited in.
+        drawn_frame is the number of the last frame drawn or dropped.
+        """
+        cells = self.snapshot()
+        if self.snapshots is None:
+            self.drawn_frame = self.frame
+            self.draw(cells)
+        elif cells and not self._hand_off((self.generation, self.frame,
+                                           cells)):
+            raise Exit()
+
+    def snapshot(self):
+        """Return the dirty cells composited as (x, y, (ch, key)).
+
+        Cells are in row-major order and the dirty set is cleared.
+        """
+        self.flush_location_cache()
+        if not self.dirty_by_location:
+            return []
+        compositor = self.compositor or self
+        cells = compositor.composite(self.dirty_by_location)
+        self.dirty_by_location = {}
+        return cells
+
+    def draw(self, cells):
+        """Write cells from snapshot to the window and refresh it.
+
+        Cells are compared with the front buffer; only cells whose
+        character or colors changed are written, and horizontally
+        adjacent ones that share colors are written with a single call.
+        cells_written holds the number of cells written by the last
+        draw.  Color changes are counted in the palette so pairs no
+        longer on screen can be reused.
+        """
+        self.cells_written = 0
+        front = self.front
+        front_width = self.front_width
+        span_x = span_y = span_key = None
+        span = []
+        brushes = self.palette
+        for x, y, cell in cells:
+            offset = y * front_width + x
+            old = front[offset]
+            if old == cell:
+                continue
+            front[offset] = cell
+            ch, key = cell
+            if key != old[1]:
+                brushes.release(old[1])
+                brushes.acquire(key)
+            if y == span_y and x == span_x + len(span) and key == span_key:
+                span.append(ch)
+                continue
+            if span:
+                self.write_brush(span_x, span_y, ''.join(span),
+                                 brushes.get(span_key))
+                self.cells_written += len(span)
+            span_x, span_y, span_key = x, y, key
+            span = [ch]
+        if not span:
+            return
+        self.write_brush(span_x, span_y, ''.join(span), brushes.get(span_key))
+        self.cells_written += len(span)
+        self.refresh()
+
+    def refresh(self):
+        """Copy the window to the terminal."""
+        if self._border:
+            self.win.border()
+        self.win.refresh()
+
+    def enable_metrics(self, current, overlay=True, path=None,
+                       interval=1.0):
+        """Start recording frame metrics, optionally shown on screen."""
+        if self.metrics is None:
+            self.metrics = metrics.Metrics(self, path or self.METRICS_PATH,
+                                           interval)
+            self.metrics.install()
+        if overlay:
+            self.metrics.show_overlay(current)
+        return self.metrics
+
+    def disable_metrics(self):
+        """Stop recording frame metrics and remove the overlay."""
+        if self.metrics is not None:
+            self.metrics.hide_overlay()
+            self.metrics.uninstall()
+            self.metrics = None
+
+    def toggle_metrics(self, current):
+        if self.metrics is None:
+            self.enable_metrics(current)
+        else:
+            self.disable_metrics()
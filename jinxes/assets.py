@@ -0,0 +1,143 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Sprite assets for jinxes library
+
+Sprites are drawn as ascii art with an optional color key: a second
+drawing of the same shape where each character names a color in a
+color map.  Compiled sprites are cached by a hash of their source, in
+memory so every load shares one sprite and, if a cache directory is
+given, on disk so later runs skip parsing.  cached keeps anything
+else that is expensive to build in the same disk cache.
+"""
+
+import cPickle
+import hashlib
+import logging
+import os
+import tempfile
+
+from jinxes import sprite
+
+# NOTE(vish): bump this when the compiled form changes so stale cache
+#             files are ignored
+FORMAT_VERSION = 1
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or
+                         os.path.join(os.path.expanduser('~'), '.cache'),
+                         'jinxes')
+
+LOG = logging.getLogger('jinxes')
+_loaded = {}
+
+
+def _split(frame):
+    if isinstance(frame, basestring):
+        frame = frame.strip('\n').split('\n')
+    return frame
+
+
+def parse_sprite(art, colors=None, color_map=None, fg=None, bg=None,
+                 transparent=None):
+    """Compile art into a sprite.Sprite.
+
+    art is a frame or a list of frames, each a newline separated string
+    or a list of lines.  Leading and trailing newlines are ignored so
+    frames can be written as triple quoted strings.  colors is a color
+    key drawn the same way and applied to every frame: the character at
+    the same position is looked up in color_map to get the fg color,
+    and cells without an entry use fg.  Characters equal to transparent
+    are left out of the sprite.
+    """
+    if not isinstance(art, list):
+        art = [art]
+    key = _split(colors) if colors else []
+    color_map = color_map or {}
+    frames = []
+    for frame in art:
+        lines = []
+        for y, line in enumerate(_split(frame)):
+            row = key[y] if y < len(key) else ''
+            cells = []
+            for x, char in enumerate(line):
+                if char == transparent:
+                    char = '\0'
+                color = color_map.get(row[x], fg) if x < len(row) else fg
+                cells.append((char, color, bg, False))
+            lines.append(cells)
+        frames.append(sprite.Frame(lines))
+    return sprite.Sprite(frames)
+
+
+def source_hash(*source):
+    """Return a hex digest identifying a sprite source."""
+    return hashlib.sha1(repr((FORMAT_VERSION,) + source)).hexdigest()
+
+
+def load_sprite(art, colors=None, color_map=None, fg=None, bg=None,
+                transparent=None, cache_dir=None):
+    """Return the sprite for art, compiling it only if it is not cached.
+
+    Takes the same arguments as parse_sprite.  Loading the same source
+    twice returns the same sprite object.  If cache_dir is set the
+    compiled sprite is also read from and written to a file there named
+    by the hash of its source.  A cache that can't be read or written
+    is skipped.
+    """
+    digest = source_hash(art, colors, sorted((color_map or {}).items()),
+                         fg, bg, transparent)
+    loaded = _loaded.get(digest)
+    if loaded is None:
+        frames = cached(digest + '.sprite', cache_dir, lambda: list(
+            parse_sprite(art, colors, color_map, fg, bg, transparent)))
+        loaded = _loaded[digest] = sprite.Sprite(frames)
+    return loaded
+
+
+def cached(name, cache_dir, build):
+    """Return the object pickled in cache_dir/name or build it.
+
+    build is called with no arguments if there is no usable cache file
+    (or no cache_dir) and its result is written to the cache.
+    """
+    if not cache_dir:
+        return build()
+    path = os.path.join(cache_dir, name)
+    try:
+        with open(path, 'rb') as f:
+            return cPickle.load(f)
+    except IOError:
+        pass
+    except Exception:
+        LOG.exception('ignoring unreadable cache file %s', path)
+    result = build()
+    _write_cache(path, result)
+    return result
+
+
+def _write_cache(path, loaded):
+    directory = os.path.dirname(path)
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        # NOTE(vish): written to a temporary file and renamed so another
+        #             process never reads a partial cache file
+        fd, tmp = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, 'wb') as f:
+            cPickle.dump(loaded, f, cPickle.HIGHEST_PROTOCOL)
+        os.rename(tmp, path)
+    except (IOError, OSError):
+        LOG.exception('unable to write cache file %s', path)
@@ -0,0 +1,220 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Deterministic benchmarks for jinxes applications
+
+Replays the sample apps against a virtual screen with a fake clock and
+a fixed random seed so that runs are comparable between releases.
+Run it from the source checkout:
+
+    python -m jinxes.benchmark --frames 500 --output bench.json
+"""
+
+import argparse
+import imp
+import json
+import math
+import os
+import timeit
+
+from jinxes import compositor as compositor_module
+from jinxes import screen
+
+
+# name: (script, application class, class attribute scaled by --scale)
+SCENARIOS = {
+    'flying-toasters': ('flying-toasters', 'Toasters', 'SPAWN_RATE'),
+    'tag-the-flag': ('tag-the-flag', 'Game', 'NUM_MONSTERS'),
+    'learn-vi-nav': ('learn-vi-nav', 'ViNav', 'SPAWN_NUMBER'),
+}
+
+
+class FakeClock(object):
+    """Clock that advances by a fixed step every time it is read."""
+
+    def __init__(self, step=1.0 / 30, start=0.0):
+        self.step = step
+        self.current = start
+
+    def __call__(self):
+        self.current += self.step
+        return self.current
+
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of values."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    rank = int(math.ceil(percent / 100.0 * len(values))) - 1
+    return values[max(rank, 0)]
+
+
+def instrument(application_class):
+    """Return a subclass of application_class that records timings.
+
+    Time spent in tick, redraw and check_collisions (collision handling) is
+    accumulated in the stats dict, along with the wall time of every
+    pass through the main loop.
+    """
+    timer = timeit.default_timer
+
+    class Benchmarked(application_class):
+
+        def __init__(self, *args, **kwargs):
+            self.stats = {'startup': 0.0, 'tick': 0.0, 'redraw': 0.0,
+                          'collisions': 0.0, 'frames': []}
+            self._started = timer()
+            self._frame_start = None
+            super(Benchmarked, self).__init__(*args, **kwargs)
+
+        def process_input(self, current):
+            self._frame_start = timer()
+            if self._started is not None:
+                self.stats['startup'] = self._frame_start - self._started
+                self._started = None
+            super(Benchmarked, self).process_input(current)
+
+        def tick(self, current, delta):
+            start = timer()
+            super(Benchmarked, self).tick(current, delta)
+            self.stats['tick'] += timer() - start
+
+        def check_collisions(self, *args, **kwargs):
+            start = timer()
+            result = super(Benchmarked, self).check_collisions(*args,
+                                                               **kwargs)
+            self.stats['collisions'] += timer() - start
+            return result
+
+        def redraw(self, current):
+            start = timer()
+            super(Benchmarked, self).redraw(current)
+            end = timer()
+            self.stats['redraw'] += end - start
+            self.stats['frames'].append(end - self._frame_start)
+
+        def win_game(self):
+            """Keep playing so every frame does comparable work."""
+
+        def lose_game(self):
+            """Keep playing so every frame does comparable work."""
+
+    Benchmarked.__name__ = application_class.__name__
+    return Benchmarked
+
+
+def load_scenario(name, path='.'):
+    """Load the application class for a sample app script."""
+    script, class_name, scale_attr = SCENARIOS[name]
+    module_name = 'jinxes_bench_' + script.replace('-', '_')
+    module = imp.load_source(module_name, os.path.join(path, script))
+    return getattr(module, class_name)
+
+
+def run_benchmark(application_class, frames=300, width=120, height=40,
+                  seed=0, fps=30.0, compositor=None, **attrs):
+    """Run application_class for frames frames and summarize the timings.
+
+    Extra keyword arguments are set as class attributes on the
+    benchmarked subclass, which is how actor counts are scaled.  If
+    compositor is 'numpy' redraw uses the NumPy compositor.
+    """
+    app_class = instrument(application_class)
+    if compositor == 'numpy':
+        if compositor_module.NUMPY_COMPOSITOR is None:
+            raise RuntimeError('numpy is not installed')
+        app_class.COMPOSITOR = compositor_module.NUMPY_COMPOSITOR
+    for key, value in attrs.iteritems():
+        setattr(app_class, key, value)
+    app = screen.run(app_class, height, width, frames=frames,
+                     clock=FakeClock(1.0 / fps), seed=seed, fps=0)
+    stats = app.stats
+    times = stats['frames']
+    total = sum(times)
+    return {
+        'application': application_class.__name__,
+        'frames': len(times),
+        'width': width,
+        'height': height,
+        'seed': seed,
+        'attrs': attrs,
+        'compositor': compositor,
+        'actors': len(app.actors),
+        'fps': len(times) / total if total else 0.0,
+        'frame_mean_ms': total * 1000.0 / len(times) if times else 0.0,
+        'frame_p99_ms': percentile(times, 99) * 1000.0,
+        'startup_s': stats['startup'],
+        'tick_s': stats['tick'],
+        'redraw_s': stats['redraw'],
+        'collisions_s': stats['collisions'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip(),
+                                     formatter_class=argparse.
+                                     RawDescriptionHelpFormatter)
+    parser.add_argument('scenarios', nargs='*',
+                        default=sorted(SCENARIOS.keys()),
+                        help='sample apps to run (default: all)')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--width', type=int, default=120)
+    parser.add_argument('--height', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fps', type=float, default=30.0,
+                        help='frame rate of the fake clock')
+    parser.add_argument('--scale', default='',
+                        help='comma separated values for the scaled '
+                             'attribute, e.g. 60,500,5000')
+    parser.add_argument('--compositor', choices=['numpy'],
+                        help='composite with numpy instead of per cell')
+    parser.add_argument('--path', default='.',
+                        help='directory containing the sample apps')
+    parser.add_argument('--output', help='write results as json here')
+    args = parser.parse_args(argv)
+
+    results = []
+    for name in args.scenarios:
+        application_class = load_scenario(name, args.path)
+        scale_attr = SCENARIOS[name][2]
+        scales = [None]
+        if args.scale:
+            scales = [float(value) for value in args.scale.split(',')]
+        for scale in scales:
+            attrs = {}
+            if scale is not None:
+                if isinstance(getattr(application_class, scale_attr), int):
+                    scale = int(scale)
+                attrs[scale_attr] = scale
+            result = run_benchmark(application_class, args.frames,
+                                   args.width, args.height, args.seed,
+                                   args.fps, args.compositor, **attrs)
+            result['scenario'] = name
+            results.append(result)
+            print ('%(scenario)s %(attrs)s: %(fps).1f fps, '
+                   'mean %(frame_mean_ms).2fms, p99 %(frame_p99_ms).2fms, '
+                   'tick %(tick_s).3fs, redraw %(redraw_s).3fs, '
+                   'collisions %(collisions_s).3fs' % result)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Vectorized compositing for jinxes library
+
+Requires numpy.  NUMPY_COMPOSITOR is None when it is not installed so
+apps can set Application.COMPOSITOR = compositor.NUMPY_COMPOSITOR and
+fall back to per-cell compositing.
+"""
+
+import itertools
+import operator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from jinxes import palette
+
+
+# NOTE(vish): -1 is a valid curses color (the terminal default) so a
+#             missing color is marked with -2 in the color planes
+NONE_COLOR = -2
+
+
+class NumpyCompositor(object):
+    """Composite dirty regions with NumPy character and color planes.
+
+    Each redraw the bounding box of the dirty cells is recomposited by
+    blitting the compiled frame of every actor touching it in z order,
+    using the same rules as Application.get_location: the topmost
+    opaque non-transparent actor gives the character and the topmost
+    actor with a color gives fg and bg.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.encoded = {}
+
+    def _frame_planes(self, frame):
+        """Return numpy planes for a compiled frame, cached on the frame.
+
+        Cells overwritten by Frame.update since the planes were built are
+        patched in place rather than building the planes again.
+        """
+        planes = frame.planes
+        if planes is not None:
+            if frame.stale_planes:
+                self._patch_planes(frame, planes)
+        else:
+            shape = (frame.height, frame.width)
+            chars = numpy.array(frame.chars, dtype='U1').view(numpy.int32)
+            chars = chars.reshape(shape)
+            fgs = self._color_plane(frame.fgs).reshape(shape)
+            bgs = self._color_plane(frame.bgs).reshape(shape)
+            inverts = numpy.array(frame.inverts, dtype=bool).reshape(shape)
+            if inverts.any():
+                fgs, bgs = (numpy.where(inverts, bgs, fgs),
+                            numpy.where(inverts, fgs, bgs))
+            planes = frame.planes = (chars, fgs, bgs, chars != 0)
+            del frame.stale_planes[:]
+        return planes
+
+    @staticmethod
+    def _patch_planes(frame, planes):
+        chars, fgs, bgs, opaque = planes
+        for i in frame.stale_planes:
+            y, x = divmod(i, frame.width)
+            ch = frame.chars[i]
+            fg = frame.fgs[i]
+            bg = frame.bgs[i]
+            if frame.inverts[i]:
+                fg, bg = bg, fg
+            chars[y, x] = ord(ch)
+            fgs[y, x] = NONE_COLOR if fg is None else fg
+            bgs[y, x] = NONE_COLOR if bg is None else bg
+            opaque[y, x] = ch != '\0'
+        del frame.stale_planes[:]
+
+    @staticmethod
+    def _color_plane(colors):
+        plane = numpy.array(colors, dtype=float)
+        plane[numpy.isnan(plane)] = NONE_COLOR
+        return plane.astype(numpy.int32)
+
+    def _actor_planes(self, actor):
+        """Return planes for the current frame of actor.
+
+        Subclasses that override get_ch (to recolor themselves, for
+        example) are sampled through get_ch for their opaque cells.
+        """
+        planes = self._frame_planes(actor.compiled_frame)
+        if not actor.custom_get_ch:
+            return planes
+        chars, fgs, bgs, opaque = planes
+        chars = chars.copy()
+        fgs = fgs.copy()
+        bgs = bgs.copy()
+        for x, y in actor.opaque:
+            c, f, b, inv = actor.get_ch(x, y)
+            if inv:
+                f, b = b, f
+            chars[y, x] = ord(c)
+            fgs[y, x] = NONE_COLOR if f is None else f
+            bgs[y, x] = NONE_COLOR if b is None else b
+        return chars, fgs, bgs, opaque
+
+    def composite(self, dirty):
+        """Return (x, y, (ch, key)) for dirty cells in row-major order."""
+        app = self.app
+        index = app.actors_by_location
+        width = index.width
+        coords = numpy.fromiter(itertools.chain.from_iterable(dirty),
+                                numpy.int32, len(dirty) * 2).reshape(-1, 2)
+        xs = coords[:, 0]
+        ys = coords[:, 1]
+        order = numpy.lexsort((xs, ys))
+        xs = xs[order]
+        ys = ys[order]
+        left = int(xs.min())
+        right = int(xs.max()) + 1
+        top = int(ys[0])
+        bottom = int(ys[-1]) + 1
+
+        cells = index.cells
+        occupied = [cells[offset] for offset in (ys * width + xs).tolist()]
+        actors = sorted(set().union(*filter(None, occupied)),
+                        key=operator.attrgetter('sort_key'))
+
+        shape = (bottom - top, right - left)
+        chars = numpy.zeros(shape, dtype=numpy.int32)
+        fgs = numpy.full(shape, NONE_COLOR, dtype=numpy.int32)
+        bgs = numpy.full(shape, NONE_COLOR, dtype=numpy.int32)
+        for actor in actors:
+            achars, afgs, abgs, aopaque = self._actor_planes(actor)
+            height, awidth = achars.shape
+            x0 = max(actor.screenx, left)
+            y0 = max(actor.screeny, top)
+            x1 = min(actor.screenx + awidth, right)
+            y1 = min(actor.screeny + height, bottom)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            src = (slice(y0 - actor.screeny, y1 - actor.screeny),
+                   slice(x0 - actor.screenx, x1 - actor.screenx))
+            dst = (slice(y0 - top, y1 - top), slice(x0 - left, x1 - left))
+            mask = aopaque[src]
+            if not actor.transparent:
+                numpy.copyto(chars[dst], achars[src], where=mask)
+            afg = afgs[src]
+            numpy.copyto(fgs[dst], afg, where=mask & (afg != NONE_COLOR))
+            abg = abgs[src]
+            numpy.copyto(bgs[dst], abg, where=mask & (abg != NONE_COLOR))
+
+        fgs[(fgs == NONE_COLOR) | (fgs == 0)] = app.DEFAULT_FG_COLOR
+        bgs[(bgs == NONE_COLOR) | (bgs == 0)] = app.DEFAULT_BG_COLOR
+        keys = fgs * palette.COLORS + bgs
+        rows = ys - top
+        cols = xs - left
+        encoded = self.encoded
+        result = []
+        for x, y, code, key in zip(xs.tolist(), ys.tolist(),
+                                   chars[rows, cols].tolist(),
+                                   keys[rows, cols].tolist()):
+            ch = encoded.get(code)
+            if ch is None:
+                if code:
+                    ch = unichr(code).encode('utf-8')
+                else:
+                    ch = app.BG_CHAR
+                encoded[code] = ch
+            result.append((x, y, (ch, key)))
+        return result
+
+
+NUMPY_COMPOSITOR = NumpyCompositor if numpy else None
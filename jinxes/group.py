@@ -0,0 +1,325 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Grouped actor physics for jinxes library
+
+Requires numpy for the vectorized step.  Without it groups still work
+and every member simply ticks on its own.
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from jinxes import application
+
+
+# array: attribute of a plain member that it replaces, dtype
+FIELDS = (
+    ('phase', '_frame', float),
+    ('x', 'x', float),
+    ('y', 'y', float),
+    ('xvel', 'xvel', float),
+    ('yvel', 'yvel', float),
+    ('frame_rate', 'frame_rate', float),
+)
+
+# attribute: dtype of the array that mirrors it
+# NOTE(vish): these are read all over, so members keep them as plain
+#             attributes and copy them to the group when they are set
+MIRRORED = (
+    ('frames', int),
+    ('hsize', int),
+    ('vsize', int),
+    ('screenx', int),
+    ('screeny', int),
+    ('bordered', bool),
+    ('collides', bool),
+)
+MIRRORED_NAMES = frozenset(name for name, dtype in MIRRORED)
+ARRAYS = tuple((name, dtype) for name, attribute, dtype in FIELDS) + MIRRORED
+
+_grouped_classes = {}
+
+
+def _storage(cls, attribute):
+    """Return where instances of cls keep attribute."""
+    # NOTE(vish): Actor keeps position, velocity and frame rate behind
+    #             properties that wake it up, Particle in plain slots
+    if isinstance(getattr(cls, attribute, None), property):
+        return '_' + attribute
+    return attribute
+
+
+def _field(name):
+
+    def get(self):
+        return getattr(self.group, name).item(self.index)
+
+    def set(self, value):
+        getattr(self.group, name)[self.index] = value
+    return property(get, set)
+
+
+def _mirrored_setattr(self, name, value):
+    object.__setattr__(self, name, value)
+    if name in MIRRORED_NAMES:
+        getattr(self.group, name)[self.index] = value
+
+
+def _grouped_class(cls):
+    """Return the subclass of cls whose state lives in a group's arrays."""
+    grouped = _grouped_classes.get(cls)
+    if grouped is None:
+        attrs = {'__slots__': (), '__module__': cls.__module__,
+                 '__setattr__': _mirrored_setattr}
+        for name, attribute, dtype in FIELDS:
+            attrs[_storage(cls, attribute)] = _field(name)
+        grouped = type(cls.__name__, (cls,), attrs)
+        _grouped_classes[cls] = grouped
+    return grouped
+
+
+class ActorGroup(object):
+    """Many similar actors moved together.
+
+    The frame phase, position, velocity and frame rate of members are
+    kept in numpy arrays owned by the group, which members read and
+    write through their index.  Their size, screen cell and flags stay
+    plain attributes that are mirrored into arrays when set.
+
+    At the start of each Application.tick the group advances the
+    animation, integrates motion, bounces bordered members off the
+    edges and projects them all onto the screen in one vectorized
+    step, instead of ticking its members one by one.  Only members
+    whose screen cell or frame changed are placed and touch the
+    location cache.  Of those, members that collide are checked for
+    collisions and placed one at a time in the order they were added,
+    as if they had ticked, so a member that moves within its cell is
+    not checked again.
+
+    Members are not ticked by the app, so actors whose tick does more
+    than move and animate should not be added.  Without numpy, or if
+    the app overrides projection or bouncing, a group is just a list
+    and every member ticks on its own.
+    """
+    CAPACITY = 64
+
+    def __init__(self, app):
+        self.app = app
+        self.members = []
+        self.size = 0
+        cls = type(app)
+        self.vectorized = (numpy is not None and
+                           cls.project_x.im_func is
+                           application.Application.project_x.im_func and
+                           cls.project_y.im_func is
+                           application.Application.project_y.im_func and
+                           cls.bounce.im_func is
+                           application.Application.bounce.im_func)
+        if self.vectorized:
+            for name, dtype in ARRAYS:
+                setattr(self, name, numpy.zeros(self.CAPACITY, dtype))
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return (actor for actor in self.members if actor is not None)
+
+    def __contains__(self, actor):
+        return actor.group is self
+
+    def add(self, actor):
+        """Add actor to the group, taking it out of any other group."""
+        if actor.group is self:
+            return
+        if actor.group is not None:
+            actor.group.remove(actor)
+        if not self.size:
+            self.app.groups.append(self)
+        self.size += 1
+        if not self.vectorized:
+            actor.group = self
+            self.members.append(actor)
+            return
+        wake = getattr(actor, 'wake', None)
+        if wake is not None:
+            wake()
+        self.app.active.pop(actor.id, None)
+        index = len(self.members)
+        if index == len(self.phase):
+            for name, dtype in ARRAYS:
+                array = getattr(self, name)
+                setattr(self, name, numpy.concatenate(
+                    (array, numpy.zeros(len(array), dtype))))
+        cls = type(actor)
+        for name, attribute, dtype in FIELDS:
+            getattr(self, name)[index] = getattr(actor,
+                                                 _storage(cls, attribute))
+        for name, dtype in MIRRORED:
+            getattr(self, name)[index] = getattr(actor, name)
+        actor.group = self
+        actor.index = index
+        actor.__class__ = _grouped_class(cls)
+        self.members.append(actor)
+
+    def remove(self, actor):
+        if actor.group is not self:
+            return
+        self.size -= 1
+        if not self.size:
+            self.app.groups.remove(self)
+        if not self.vectorized:
+            actor.group = None
+            self.members.remove(actor)
+            return
+        index = actor.index
+        cls = type(actor).__mro__[1]
+        values = [(_storage(cls, attribute), getattr(self, name).item(index))
+                  for name, attribute, dtype in FIELDS]
+        actor.__class__ = cls
+        for attribute, value in values:
+            setattr(actor, attribute, value)
+        # NOTE(vish): the hole is closed on the next step so removing
+        #             many members in one frame stays cheap
+        self.members[index] = None
+        actor.group = None
+        actor.index = None
+        self.app.notify_waking(actor)
+
+    def _compact(self):
+        """Close the holes left by removed members, keeping their order."""
+        keep = [i for i, actor in enumerate(self.members)
+                if actor is not None]
+        for name, dtype in ARRAYS:
+            array = getattr(self, name)
+            kept = array[keep]
+            array[:len(kept)] = kept
+        self.members = [self.members[i] for i in keep]
+        for index, actor in enumerate(self.members):
+            actor.index = index
+
+    def step(self, current, delta):
+        """Animate, move, bounce and project every member at once."""
+        if not self.vectorized or not self.size:
+            return
+        if len(self.members) != self.size:
+            self._compact()
+        app = self.app
+        members = self.members
+        n = len(members)
+        width = float(app.width)
+        height = float(app.height)
+
+        phase = self.phase[:n]
+        frames = self.frames[:n]
+        shown = phase.astype(int)
+        phase += delta * self.frame_rate[:n]
+        wrapped = phase >= frames
+        while wrapped.any():
+            phase[wrapped] -= frames[wrapped]
+            wrapped = phase >= frames
+        animated = phase.astype(int) != shown
+
+        oldx = self.x[:n].copy()
+        oldy = self.y[:n].copy()
+        xvel = self.xvel[:n]
+        yvel = self.yvel[:n]
+        x = oldx + delta * xvel
+        y = oldy + delta * yvel
+        halfh = self.hsize[:n] * 0.5 / width
+        halfv = self.vsize[:n] * 0.5 / height
+        bordered = self.bordered[:n]
+        self._bounce(x, halfh, xvel, bordered)
+        self._bounce(y, halfv, yvel, bordered)
+        screenx = (numpy.trunc((x - halfh) * width + 0.5).astype(int) +
+                   app.left)
+        screeny = (numpy.trunc((y - halfv) * height + 0.5).astype(int) +
+                   app.top)
+
+        changed = (animated | (screenx != self.screenx[:n]) |
+                   (screeny != self.screeny[:n]))
+        colliding = changed & self.collides[:n]
+        if colliding.any():
+            self._collide(current, delta, numpy.flatnonzero(colliding),
+                          x, y, oldx, oldy, animated, phase)
+            rest = ~colliding
+            self.x[:n][rest] = x[rest]
+            self.y[:n][rest] = y[rest]
+        else:
+            self.x[:n] = x
+            self.y[:n] = y
+
+        for i in numpy.flatnonzero(changed & ~colliding).tolist():
+            actor = members[i]
+            if actor is None:
+                continue
+            if animated[i]:
+                actor.animate(current, phase.item(i))
+            actor.place(current, x.item(i), y.item(i), screenx.item(i),
+                        screeny.item(i))
+
+    def _collide(self, current, delta, indices, x, y, oldx, oldy, animated,
+                 phase):
+        """Check and place the colliding members that changed, in order.
+
+        A member is placed right after its check, so the ones after it
+        see it where it moved to.  If a collide call changed its velocity
+        since the vectorized step its move is worked out again.
+        """
+        app = self.app
+        members = self.members
+        xvels = self.xvel[:len(x)].copy()
+        yvels = self.yvel[:len(y)].copy()
+        for i in indices.tolist():
+            actor = members[i]
+            if actor is None:
+                continue
+            newx = x.item(i)
+            newy = y.item(i)
+            xvel = actor.xvel
+            yvel = actor.yvel
+            if xvel != xvels.item(i) or yvel != yvels.item(i):
+                newx = oldx.item(i) + delta * xvel
+                newy = oldy.item(i) + delta * yvel
+                if actor.bordered:
+                    newx, newy = app.bounce(actor, newx, newy)
+            newx, newy = app.check_collisions(actor, current, newx, newy)
+            x[i] = newx
+            y[i] = newy
+            if animated[i]:
+                actor.animate(current, phase.item(i))
+            actor.place(current, newx, newy,
+                        app.project_x(newx, actor.hsize),
+                        app.project_y(newy, actor.vsize))
+
+    @staticmethod
+    def _bounce(values, half, vel, bordered):
+        """Vectorized Application.bounce along one axis, in place."""
+        low = 0.0 + half
+        high = 1.0 - half
+        moving = vel != 0
+        under = bordered & (values < low)
+        over = bordered & ~under & (values > high)
+        values[:] = numpy.where(under, numpy.where(moving, low * 2 - values,
+                                                   low), values)
+        values[:] = numpy.where(over, numpy.where(moving, high * 2 - values,
+                                                  high), values)
+        flipped = (under | over) & moving
+        vel[flipped] = -vel[flipped]
@@ -0,0 +1,333 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Frame metrics for jinxes library
+
+Metrics times the phases of the main loop and counts the work done in
+them by wrapping methods on a single application object, so an app
+that never enables it runs exactly the code it would without it.
+"""
+
+import collections
+import json
+import timeit
+
+from jinxes import actor
+
+
+# phase: application method timed into it
+PHASES = (
+    ('input', 'process_input'),
+    ('tick', 'tick'),
+    ('collisions', 'check_collisions'),
+    ('redraw', 'redraw'),
+)
+
+# phase: application method that draws, timed into it
+DRAW_PHASES = (
+    ('draw', 'draw'),
+    ('refresh', 'refresh'),
+)
+
+# counter: application method counted in it
+COUNTERS = (
+    ('created', 'notify_created'),
+    ('destroyed', 'notify_destroyed'),
+    ('cache_sets', 'set_location_cache'),
+    ('cache_clears', 'clear_location_cache'),
+)
+
+# counter: application method that draws, counted in it
+DRAW_COUNTERS = (
+    ('writes', 'write_brush'),
+)
+
+
+class Overlay(actor.Actor):
+    """Lines of text pinned to the top left corner above everything."""
+
+    def __init__(self, app, lines, current=None, z=1000):
+        super(Overlay, self).__init__(app, 0.0, 0.0, '\n'.join(lines),
+                                      current, fg=231, bg=236, z=z)
+        self.bordered = False
+        self.collides = False
+        self.frame_rate = 0.0
+        self.show(current, lines)
+
+    def show(self, current, lines):
+        self.app.notify_animating(self)
+        self.display = '\n'.join(lines)
+        self.pin(current)
+        self.updated = current
+        self.app.notify_animated(self)
+
+    def pin(self, current):
+        """Move back to the top left corner, e.g. after a resize."""
+        self.move(current, self.hsize * 0.5 / self.app.width,
+                  self.vsize * 0.5 / self.app.height)
+
+
+class Interval(object):
+    """Totals for the frames from first on, until closed by a report."""
+
+    def __init__(self, started, first):
+        self.started = started
+        self.first = first
+        self.last = None
+        self.snapshot = None
+        self.frames = 0
+        self.times = dict.fromkeys([phase for phase, name in
+                                    PHASES + DRAW_PHASES], 0.0)
+        self.times['frame'] = 0.0
+        self.counts = dict.fromkeys([counter for counter, name in
+                                     COUNTERS + DRAW_COUNTERS], 0)
+        for counter in ('dirty', 'composited', 'cells', 'allocations',
+                        'evictions'):
+            self.counts[counter] = 0
+        self.state = None
+
+    def close(self, current, app):
+        """Stop at the app's current frame and note what it holds."""
+        self.last = app.frame
+        self.state = {
+            'time': current,
+            'elapsed': current - self.started,
+            'actors': len(app.actors),
+            'active': len(app.active),
+            'events': len(app.scheduler),
+            'brushes': len(app.palette),
+        }
+
+    def holds(self, frame):
+        return self.first <= frame and (self.last is None or
+                                        frame <= self.last)
+
+    def drawn(self, drawn_frame):
+        """Return True once the last snapshot handed over was drawn."""
+        return self.snapshot is None or self.snapshot <= drawn_frame
+
+
+class Metrics(object):
+    """Per-phase timings and counters for an application.
+
+    Phases nest the way the methods do, so collisions is part of tick,
+    refresh is part of draw and draw is part of redraw.  frame is the
+    whole pass through the main loop apart from the time spent waiting
+    for the next frame.  dirty counts the cells marked for compositing,
+    composited those composited into snapshots and cells those draw
+    wrote after comparing them with the front buffer.  writes,
+    allocations and evictions count the calls and color pairs draw
+    needed for them.
+
+    When the app is threaded, redraw only composites and hands over
+    the snapshot and frame leaves out drawing it.  The work done by
+    draw is recorded, under the app's screen_lock, with the frame the
+    snapshot was composited in, so a report is only made once every
+    snapshot from its frames has been drawn.
+
+    Every interval seconds of app time a report of the totals since
+    the last one is made: appended as a line of json to path if it is
+    set, kept in reports (the most recent keep of them) and shown on
+    the overlay if it is visible.
+    """
+    timer = staticmethod(timeit.default_timer)
+
+    def __init__(self, app, path=None, interval=1.0, keep=60):
+        self.app = app
+        self.path = path
+        self.interval = interval
+        self.reports = collections.deque(maxlen=keep)
+        self.overlay = None
+        self.installed = False
+        self.current = Interval(None, app.frame)
+        self.closed = collections.deque()
+        self.drawing = None
+        self.frame_start = None
+
+    def install(self):
+        """Start recording by wrapping the app's methods."""
+        if self.installed:
+            return
+        app = self.app
+        for phase, name in PHASES:
+            setattr(app, name, self._timed(phase, getattr(app, name)))
+        for counter, name in COUNTERS:
+            setattr(app, name, self._counted(counter, getattr(app, name)))
+        for phase, name in DRAW_PHASES:
+            setattr(app, name, self._timed(phase, getattr(app, name),
+                                           drawn=True))
+        for counter, name in DRAW_COUNTERS:
+            setattr(app, name, self._counted(counter, getattr(app, name),
+                                             drawn=True))
+        process_input = app.process_input
+        redraw = app.redraw
+        snapshot = app.snapshot
+        draw = app.draw
+
+        def start_frame(current):
+            self.frame_start = self.timer()
+            process_input(current)
+
+        def end_frame(current):
+            app.flush_location_cache()
+            self.current.counts['dirty'] += len(app.dirty_by_location)
+            redraw(current)
+            self.frame_done(current)
+
+        def counted_snapshot():
+            cells = snapshot()
+            if cells:
+                self.current.snapshot = app.frame
+                self.current.counts['composited'] += len(cells)
+            return cells
+
+        def drawing(cells):
+            palette = app.palette
+            allocations = palette.allocations
+            evictions = palette.evictions
+            self.drawing = self.holding(app.drawn_frame)
+            try:
+                return draw(cells)
+            finally:
+                counts = self.drawing.counts
+                counts['cells'] += app.cells_written
+                counts['allocations'] += palette.allocations - allocations
+                counts['evictions'] += palette.evictions - evictions
+                self.drawing = None
+
+        app.process_input = start_frame
+        app.redraw = end_frame
+        app.snapshot = counted_snapshot
+        app.draw = drawing
+        self.installed = True
+
+    def uninstall(self):
+        """Stop recording and put the app's own methods back."""
+        if not self.installed:
+            return
+        for phase, name in PHASES + DRAW_PHASES + COUNTERS + DRAW_COUNTERS:
+            del self.app.__dict__[name]
+        del self.app.__dict__['snapshot']
+        self.installed = False
+
+    def holding(self, frame):
+        """Return the interval frame belongs to."""
+        for interval in self.closed:
+            if interval.holds(frame):
+                return interval
+        return self.current
+
+    def _timed(self, phase, method, drawn=False):
+        timer = self.timer
+
+        def timed(*args, **kwargs):
+            interval = (drawn and self.drawing) or self.current
+            start = timer()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                interval.times[phase] += timer() - start
+        return timed
+
+    def _counted(self, counter, method, drawn=False):
+
+        def counted(*args, **kwargs):
+            interval = (drawn and self.drawing) or self.current
+            interval.counts[counter] += 1
+            return method(*args, **kwargs)
+        return counted
+
+    def frame_done(self, current):
+        interval = self.current
+        interval.frames += 1
+        if self.frame_start is not None:
+            interval.times['frame'] += self.timer() - self.frame_start
+        if interval.started is None:
+            interval.started = current
+        elif current - interval.started >= self.interval:
+            self.report(current)
+        elif self.closed:
+            self.publish(current)
+
+    def report(self, current):
+        """Close the totals since the last report and start over.
+
+        The report is made as soon as every snapshot it covers is drawn.
+        """
+        app = self.app
+        with app.screen_lock:
+            self.current.close(current, app)
+            self.closed.append(self.current)
+            self.current = Interval(current, app.frame + 1)
+        self.publish(current)
+
+    def publish(self, current):
+        """Make the reports for closed intervals that are fully drawn."""
+        app = self.app
+        ready = []
+        with app.screen_lock:
+            while self.closed and self.closed[0].drawn(app.drawn_frame):
+                ready.append(self.closed.popleft())
+        for interval in ready:
+            frames = interval.frames or 1
+            report = dict(interval.state, frames=interval.frames)
+            report['ms'] = dict((phase, elapsed * 1000.0 / frames)
+                                for phase, elapsed
+                                in interval.times.iteritems())
+            report.update(interval.counts)
+            self.reports.append(report)
+            if self.path:
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(report, sort_keys=True) + '\n')
+            if self.overlay is not None:
+                self.overlay.show(current, self.lines(report))
+
+    @staticmethod
+    def lines(report):
+        """Return report formatted for the overlay."""
+        ms = report['ms']
+        fps = report['frames'] / report['elapsed'] if report['elapsed'] else 0
+        return [
+            '%5.1f fps %6.2f ms/frame' % (fps, ms['frame']),
+            'input %.2f tick %.2f coll %.2f' % (ms['input'], ms['tick'],
+                                                ms['collisions']),
+            'redraw %.2f draw %.2f refresh %.2f' % (ms['redraw'],
+                                                    ms['draw'],
+                                                    ms['refresh']),
+            'dirty %(dirty)d comp %(composited)d cells %(cells)d '
+            'writes %(writes)d' % report,
+            'actors %(actors)d active %(active)d +%(created)d '
+            '-%(destroyed)d' % report,
+            'cache +%(cache_sets)d -%(cache_clears)d '
+            'brushes %(brushes)d new %(allocations)d' % report,
+        ]
+
+    def show_overlay(self, current):
+        if self.overlay is None:
+            report = self.reports[-1] if self.reports else None
+            lines = self.lines(report) if report else ['collecting metrics']
+            self.overlay = Overlay(self.app, lines, current)
+
+    def resized(self, current):
+        """Keep the overlay in the corner of the resized screen."""
+        if self.overlay is not None:
+            self.overlay.pin(current)
+
+    def hide_overlay(self):
+        if self.overlay is not None:
+            self.overlay.destroy()
+            self.overlay = None
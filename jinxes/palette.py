@@ -0,0 +1,121 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Color pair allocation for jinxes library
+"""
+
+import collections
+
+COLORS = 256
+
+
+def brush_key(fg, bg):
+    """Pack fg and bg colors into an integer brush key."""
+    return fg * COLORS + bg
+
+
+class Palette(object):
+    """Curses color pairs for brushes, allocated on demand.
+
+    Brushes are keyed by brush_key(fg, bg) for colors 0 to 255 and the
+    curses attribute for each key is kept in table, a flat list with an
+    entry for every possible key that is 0 until the key is allocated,
+    so a lookup is a single index.
+
+    refs counts the screen cells currently drawn with each brush.  The
+    application acquires and releases brushes as redraw overwrites
+    cells, and a brush whose count drops to zero moves to the end of an
+    LRU of unused brushes.  When the color pairs run out the least
+    recently used unused brush gives up its pair, so allocation never
+    has to look at the screen.  Pinned brushes, like the background, are
+    never reclaimed.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.free = collections.deque(xrange(1, backend.COLOR_PAIRS))
+        self.table = [0] * (COLORS * COLORS)
+        self.pairs = {}
+        self.refs = [0] * (COLORS * COLORS)
+        self.unused = collections.OrderedDict()
+        self.pinned = set()
+        self.allocations = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def __contains__(self, key):
+        return key in self.pairs
+
+    def get(self, key):
+        """Return the curses attribute for key."""
+        return self.table[key] or self.allocate(key)
+
+    def allocate(self, key):
+        """Set up a color pair for key and return its attribute."""
+        if key in self.pairs:
+            return self.table[key]
+        try:
+            pair = self.free.popleft()
+        except IndexError:
+            if not self.unused:
+                raise Exception('out of brushes')
+            old, pair = self.unused.popitem(last=False)
+            del self.pairs[old]
+            self.table[old] = 0
+            self.evictions += 1
+        fg, bg = divmod(key, COLORS)
+        self.backend.init_pair(pair, fg, bg)
+        brush = self.backend.color_pair(pair)
+        self.pairs[key] = pair
+        self.table[key] = brush
+        self.allocations += 1
+        if not self.refs[key] and key not in self.pinned:
+            self.unused[key] = pair
+        return brush
+
+    def pin(self, key):
+        """Return the attribute for key and never reclaim its pair."""
+        self.pinned.add(key)
+        self.unused.pop(key, None)
+        return self.get(key)
+
+    def acquire(self, key, count=1):
+        """Count count more cells drawn with key."""
+        refs = self.refs[key]
+        self.refs[key] = refs + count
+        if not refs:
+            self.unused.pop(key, None)
+
+    def release(self, key, count=1):
+        """Count count fewer cells drawn with key."""
+        refs = self.refs[key] - count
+        self.refs[key] = refs
+        if refs <= 0 and key in self.pairs and key not in self.pinned:
+            self.unused[key] = self.pairs[key]
+
+    def reset(self, key, count):
+        """Forget all references and count count cells drawn with key.
+
+        Used when the whole window has been cleared to one brush.
+        """
+        self.refs = [0] * (COLORS * COLORS)
+        self.refs[key] = count
+        self.unused = collections.OrderedDict(
+            (k, pair) for k, pair in self.pairs.iteritems()
+            if k != key and k not in self.pinned)
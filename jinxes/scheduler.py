@@ -0,0 +1,75 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Timed events for jinxes library
+"""
+
+import heapq
+import itertools
+
+
+class Scheduler(object):
+    """Callbacks to run once a clock reaches a given time.
+
+    Events are kept in a heap ordered by time and then by the order
+    they were scheduled, so run only looks at the events that are due.
+    The clock can be anything that increases, like the application
+    time or a count of game ticks.  Cancelled events are dropped when
+    they reach the top of the heap.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.counter = itertools.count()
+        self.pending = 0
+
+    def __len__(self):
+        return self.pending
+
+    def schedule(self, when, callback, *args):
+        """Call callback(now, *args) from the first run at or after when.
+
+        Returns the event, which can be passed to cancel.
+        """
+        event = [when, next(self.counter), callback, args]
+        heapq.heappush(self.heap, event)
+        self.pending += 1
+        return event
+
+    def cancel(self, event):
+        if event[2] is not None:
+            event[2] = None
+            self.pending -= 1
+
+    def next_time(self):
+        """Return the time of the next pending event or None."""
+        heap = self.heap
+        while heap and heap[0][2] is None:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def run(self, now):
+        """Run every event due at now, including ones scheduled by them."""
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            event = heapq.heappop(heap)
+            callback = event[2]
+            if callback is None:
+                continue
+            event[2] = None
+            self.pending -= 1
+            callback(now, *event[3])
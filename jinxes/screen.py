@@ -0,0 +1,198 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Headless screen backend for the jinxes library
+"""
+
+import collections
+import curses
+
+from jinxes import application
+
+
+def run(application_class, height=24, width=80, keys=None, frames=None,
+        **kwargs):
+    """Run a jinxes application subclass against a virtual screen.
+
+    Returns the application object once it exits so the resulting
+    screen can be inspected.  If frames is set the application exits
+    after that many passes through the main loop.
+    """
+    backend = VirtualBackend(height, width, keys, frames)
+    return application_class(backend.scr, backend=backend, **kwargs)
+
+
+class VirtualScreen(object):
+    """In-memory window supporting the curses window calls jinxes uses.
+
+    Cells are stored as (character, attribute) pairs in a row-major
+    grid.  Input is scripted: each call to getch consumes the next
+    queued key, and None in the queue stands for a frame without input.
+    """
+
+    def __init__(self, height=24, width=80, keys=None, frames=None):
+        self.keys = collections.deque()
+        self.frames = frames
+        self.polls = 0
+        self.waits = []
+        self.refreshes = 0
+        self.writes = 0
+        self.delay = True
+        self.background = (u' ', 0)
+        self.resize(height, width)
+        if keys:
+            self.push_keys(keys)
+
+    def resize(self, height, width):
+        self.height = height
+        self.width = width
+        self.clear()
+
+    def push_keys(self, keys):
+        """Queue characters, key codes or None to be read by getch."""
+        self.keys.extend(keys)
+
+    def getch(self):
+        if self.frames is not None and self.polls >= self.frames:
+            raise application.Exit()
+        self.polls += 1
+        if not self.keys:
+            return curses.ERR
+        key = self.keys.popleft()
+        if key is None:
+            return curses.ERR
+        if isinstance(key, basestring):
+            return ord(key)
+        return key
+
+    def wait(self, timeout):
+        """Record the frame pacing sleep and return immediately."""
+        self.waits.append(timeout)
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def nodelay(self, flag):
+        self.delay = not flag
+
+    def keypad(self, flag):
+        pass
+
+    def bkgdset(self, ch, attr=0):
+        if not isinstance(ch, basestring):
+            ch = unichr(ch)
+        self.background = (ch, attr)
+
+    def bkgd(self, ch, attr=0):
+        self.bkgdset(ch, attr)
+        self.clear()
+
+    def clear(self):
+        self.cells = [self.background] * (self.width * self.height)
+
+    erase = clear
+
+    def border(self):
+        right = self.width - 1
+        bottom = self.height - 1
+        for x in xrange(1, right):
+            self.cells[x] = (u'-', 0)
+            self.cells[bottom * self.width + x] = (u'-', 0)
+        for y in xrange(1, bottom):
+            self.cells[y * self.width] = (u'|', 0)
+            self.cells[y * self.width + right] = (u'|', 0)
+        for x, y in ((0, 0), (right, 0), (0, bottom), (right, bottom)):
+            self.cells[y * self.width + x] = (u'+', 0)
+
+    def addstr(self, y, x, text, attr=0):
+        """Write text at y, x wrapping at the right edge like curses.
+
+        Raises curses.error if the text starts off screen or runs
+        past the bottom right cell.
+        """
+        if not 0 <= y < self.height or not 0 <= x < self.width:
+            raise curses.error('addstr() returned ERR')
+        if isinstance(text, str):
+            text = text.decode('utf-8')
+        self.writes += 1
+        pos = y * self.width + x
+        end = len(self.cells)
+        for char in text:
+            if pos >= end:
+                raise curses.error('addstr() returned ERR')
+            self.cells[pos] = (char, attr)
+            pos += 1
+        if pos >= end:
+            raise curses.error('addstr() returned ERR')
+
+    def refresh(self):
+        self.refreshes += 1
+
+    def cell(self, x, y):
+        """Return the (character, attribute) pair at x, y."""
+        return self.cells[y * self.width + x]
+
+    def row(self, y):
+        """Return the characters on row y as a unicode string."""
+        start = y * self.width
+        return u''.join(ch for ch, attr in self.cells[start:start +
+                                                      self.width])
+
+    def dump(self):
+        """Return the whole screen as newline separated rows."""
+        return u'\n'.join(self.row(y) for y in xrange(self.height))
+
+
+class VirtualBackend(object):
+    """Stand-in for the curses module functions used by Application."""
+    COLOR_PAIRS = 256
+    ERR = curses.ERR
+    KEY_RESIZE = curses.KEY_RESIZE
+    error = curses.error
+
+    def __init__(self, height=24, width=80, keys=None, frames=None):
+        self.scr = VirtualScreen(height, width, keys, frames)
+        self.win = None
+        self.pairs = {}
+        self.cursor = 1
+
+    def curs_set(self, visibility):
+        self.cursor = visibility
+
+    def init_pair(self, pair_number, fg, bg):
+        self.pairs[pair_number] = (fg, bg)
+
+    def color_pair(self, pair_number):
+        return pair_number << 8
+
+    def pair_number(self, attr):
+        return (attr >> 8) & 0xff
+
+    def newwin(self, nlines, ncols, begin_y=0, begin_x=0):
+        height = nlines or self.scr.height - begin_y
+        width = ncols or self.scr.width - begin_x
+        self.win = VirtualScreen(height, width)
+        return self.win
+
+    def resize(self, height, width):
+        """Resize the terminal and queue a KEY_RESIZE for the app."""
+        self.scr.resize(height, width)
+        self.scr.push_keys([self.KEY_RESIZE])
+
+    def colors(self, attr):
+        """Return the (fg, bg) colors a brush attribute was set up with."""
+        return self.pairs.get(self.pair_number(attr))
@@ -0,0 +1,173 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Spatial indexes for jinxes library
+"""
+
+import bisect
+
+
+class SpatialGrid(object):
+    """Uniform grid of buckets over actor bounding boxes.
+
+    Boxes are inclusive (left, top, right, bottom) screen coordinates.
+    Each actor is stored in every bucket its box touches, so a query
+    only has to look at the buckets under the query box and then
+    compare boxes to find the candidates worth a per-cell check.
+    """
+
+    def __init__(self, bucket_size=8):
+        self.bucket_size = bucket_size
+        self.buckets = {}
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, actor):
+        return actor.id in self.entries
+
+    def _keys(self, box):
+        size = self.bucket_size
+        left, top, right, bottom = box
+        return [(bx, by)
+                for by in xrange(top // size, bottom // size + 1)
+                for bx in xrange(left // size, right // size + 1)]
+
+    def insert(self, actor, box):
+        """Add actor with box, moving it if it is already present."""
+        entry = self.entries.get(actor.id)
+        if entry is not None:
+            if entry[1] == box:
+                return
+            self.remove(actor)
+        entry = (actor, box, self._keys(box))
+        buckets = self.buckets
+        for key in entry[2]:
+            try:
+                buckets[key][actor.id] = entry
+            except KeyError:
+                buckets[key] = {actor.id: entry}
+        self.entries[actor.id] = entry
+
+    def remove(self, actor):
+        entry = self.entries.pop(actor.id, None)
+        if entry is None:
+            return
+        buckets = self.buckets
+        for key in entry[2]:
+            bucket = buckets[key]
+            del bucket[actor.id]
+            if not bucket:
+                del buckets[key]
+
+    def query(self, box):
+        """Return the actors whose boxes overlap box."""
+        left, top, right, bottom = box
+        buckets = self.buckets
+        keys = self._keys(box)
+        found = []
+        seen = set() if len(keys) > 1 else None
+        for key in keys:
+            bucket = buckets.get(key)
+            if not bucket:
+                continue
+            for actor_id, (actor, obox, okeys) in bucket.iteritems():
+                oleft, otop, oright, obottom = obox
+                if (oleft <= right and left <= oright and
+                    otop <= bottom and top <= obottom):
+                    if seen is not None:
+                        if actor_id in seen:
+                            continue
+                        seen.add(actor_id)
+                    found.append(actor)
+        return found
+
+
+class ScreenIndex(object):
+    """Actors occupying each screen cell, in z order.
+
+    Cells are kept in a flat row-major list indexed by y * width + x.
+    The occupant list for a cell is only allocated when an actor first
+    lands on it and is dropped again when the cell empties, so creating
+    an index is a single list allocation and memory use follows the
+    number of occupied cells.  Indexing with an (x, y) tuple returns the
+    occupants like the dict of lists it replaces.
+
+    Each occupied cell also keeps the sort_key of its actors in a
+    parallel list so insertion and removal are a bisect.  An actor's
+    sort_key must not change while it is in the index.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.cells = [None] * (width * height)
+        self.keys = [None] * (width * height)
+
+    def _offset(self, x, y):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        raise KeyError((x, y))
+
+    def __getitem__(self, key):
+        return self.cells[self._offset(*key)] or ()
+
+    def __contains__(self, key):
+        x, y = key
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def occupied(self):
+        """Return the number of cells with at least one occupant."""
+        return sum(1 for cell in self.cells if cell)
+
+    def insert(self, x, y, actor):
+        """Add actor to the cell at x, y keeping z order."""
+        offset = self._offset(x, y)
+        key = actor.sort_key
+        keys = self.keys[offset]
+        if keys is None:
+            self.cells[offset] = [actor]
+            self.keys[offset] = [key]
+            return
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return
+        keys.insert(i, key)
+        self.cells[offset].insert(i, actor)
+
+    def remove(self, x, y, actor):
+        """Remove actor from the cell at x, y if it is there."""
+        offset = self._offset(x, y)
+        keys = self.keys[offset]
+        if keys is None:
+            return
+        key = actor.sort_key
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            if len(keys) == 1:
+                self.cells[offset] = None
+                self.keys[offset] = None
+            else:
+                del keys[i]
+                del self.cells[offset][i]
@@ -0,0 +1,273 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Compiled sprite frames for jinxes library
+"""
+
+from jinxes import palette
+
+IDENTITY_KERNEL = ((0, 0),)
+PLUS_KERNEL = ((0, -1), (-1, 0), (0, 0), (1, 0), (0, 1))
+
+
+class Frame(object):
+    """A single compiled animation frame.
+
+    Cells are stored row-major in parallel lists of characters, fg and
+    bg colors and inverted flags, padded with '\\0' to the width of the
+    widest line.  opaque lists the (x, y) offsets of every cell that is
+    not '\\0' so the hot paths never walk the transparent padding.
+    """
+    __slots__ = ('width', 'height', 'chars', 'fgs', 'bgs', 'inverts',
+                 'opaque', 'masks', 'bounds', 'mask_sets', 'planes',
+                 'stale_planes', 'resolved_cells')
+
+    def __init__(self, lines, fg=None, bg=None, inverted=False):
+        self.width = max(len(line) for line in lines) if lines else 0
+        self.height = len(lines)
+        self.chars = chars = []
+        self.fgs = fgs = []
+        self.bgs = bgs = []
+        self.inverts = inverts = []
+        opaque = []
+        for y, line in enumerate(lines):
+            start = len(chars)
+            if isinstance(line, basestring):
+                count = len(line)
+                chars.extend(line)
+                fgs.extend([fg] * count)
+                bgs.extend([bg] * count)
+                inverts.extend([inverted] * count)
+            else:
+                for char in line:
+                    if len(char) == 1:
+                        char = (char, fg, bg, inverted)
+                    ch, f, b, inv = char
+                    chars.append(ch)
+                    fgs.append(f)
+                    bgs.append(b)
+                    inverts.append(inv)
+            if '\0' in chars[start:]:
+                opaque.extend((x, y) for x, ch in enumerate(chars[start:])
+                              if ch != '\0')
+            else:
+                opaque.extend(zip(xrange(len(chars) - start),
+                                  [y] * (len(chars) - start)))
+            padding = self.width - len(line)
+            chars.extend(['\0'] * padding)
+            fgs.extend([None] * padding)
+            bgs.extend([None] * padding)
+            inverts.extend([inverted] * padding)
+        self.opaque = tuple(opaque)
+        self.masks = {}
+        self.bounds = {}
+        self.mask_sets = {}
+        self.planes = None
+        self.stale_planes = []
+        self.resolved_cells = {}
+
+    # NOTE(vish): only the cells are pickled, the caches are rebuilt
+    def __getstate__(self):
+        return (self.width, self.height, self.chars, self.fgs, self.bgs,
+                self.inverts, self.opaque)
+
+    def __setstate__(self, state):
+        (self.width, self.height, self.chars, self.fgs, self.bgs,
+         self.inverts, self.opaque) = state
+        self.masks = {}
+        self.bounds = {}
+        self.mask_sets = {}
+        self.planes = None
+        self.stale_planes = []
+        self.resolved_cells = {}
+
+    def copy(self):
+        """Return a frame with its own copy of the cells."""
+        frame = Frame.__new__(Frame)
+        frame.__setstate__((self.width, self.height, list(self.chars),
+                            list(self.fgs), list(self.bgs),
+                            list(self.inverts), self.opaque))
+        return frame
+
+    def update(self, x, y, lines, fg=None, bg=None, inverted=False):
+        """Overwrite the cells starting at x, y in place.
+
+        lines is a newline separated string or a list of lines like the
+        ones the frame was built from, and is clipped to the frame.
+        Returns the (x, y) offsets written and whether any of them went
+        from '\0' to opaque or back, which changes the frame's shape.
+        If planes are cached the indices written are added to
+        stale_planes for the compositor to patch.
+        """
+        if isinstance(lines, basestring):
+            lines = lines.split('\n')
+        width = self.width
+        chars = self.chars
+        resolved = self.resolved_cells.values()
+        stale = self.stale_planes if self.planes is not None else None
+        written = []
+        reshaped = False
+        for row, line in enumerate(lines, y):
+            if not 0 <= row < self.height:
+                continue
+            for col, char in enumerate(line, x):
+                if not 0 <= col < width:
+                    continue
+                if len(char) == 1:
+                    char = (char, fg, bg, inverted)
+                i = row * width + col
+                ch = char[0]
+                if (chars[i] == '\0') != (ch == '\0'):
+                    reshaped = True
+                chars[i] = ch
+                self.fgs[i] = char[1]
+                self.bgs[i] = char[2]
+                self.inverts[i] = char[3]
+                for cells in resolved:
+                    cells[i] = None
+                if stale is not None:
+                    stale.append(i)
+                written.append((col, row))
+        if reshaped:
+            self.opaque = tuple((i % width, i // width)
+                                for i, ch in enumerate(chars) if ch != '\0')
+            self.masks = {}
+            self.bounds = {}
+            self.mask_sets = {}
+        return written, reshaped
+
+    def get(self, x, y):
+        """Return the (char, fg, bg, inverted) tuple at x, y."""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            i = y * self.width + x
+            return (self.chars[i], self.fgs[i], self.bgs[i],
+                    self.inverts[i])
+        return None
+
+    def resolved(self, i, default_fg, default_bg):
+        """Return (utf-8 char, brush key) for the opaque cell at index i.
+
+        Colors that are not set fall back to the defaults and inverted
+        cells have their colors swapped, so the result is what the cell
+        looks like when nothing is drawn beneath it.  Results are cached
+        per cell and pair of defaults.
+        """
+        defaults = (default_fg, default_bg)
+        cells = self.resolved_cells.get(defaults)
+        if cells is None:
+            cells = self.resolved_cells[defaults] = [None] * len(self.chars)
+        cell = cells[i]
+        if cell is None:
+            fg = self.fgs[i]
+            bg = self.bgs[i]
+            if self.inverts[i]:
+                fg, bg = bg, fg
+            cell = cells[i] = (self.chars[i].encode('utf-8'),
+                               palette.brush_key(fg or default_fg,
+                                                 bg or default_bg))
+        return cell
+
+    def mask(self, kernel):
+        """Return the opaque offsets dilated by kernel.
+
+        kernel is a tuple of (x, y) offsets that every opaque cell is
+        spread to.  The result is computed once per kernel and cached.
+        """
+        try:
+            return self.masks[kernel]
+        except KeyError:
+            pass
+        if kernel == IDENTITY_KERNEL:
+            mask = self.opaque
+        else:
+            cells = set((x + xoffset, y + yoffset)
+                        for x, y in self.opaque
+                        for xoffset, yoffset in kernel)
+            mask = tuple(sorted(cells, key=lambda (x, y): (y, x)))
+        self.masks[kernel] = mask
+        return mask
+
+    def mask_set(self, kernel):
+        """Return mask(kernel) as a cached frozenset."""
+        try:
+            return self.mask_sets[kernel]
+        except KeyError:
+            mask_set = frozenset(self.mask(kernel))
+            self.mask_sets[kernel] = mask_set
+            return mask_set
+
+    def mask_bounds(self, kernel):
+        """Return (left, top, right, bottom) of mask(kernel) or None."""
+        try:
+            return self.bounds[kernel]
+        except KeyError:
+            pass
+        mask = self.mask(kernel)
+        bounds = None
+        if mask:
+            xs = [x for x, y in mask]
+            ys = [y for x, y in mask]
+            bounds = (min(xs), min(ys), max(xs), max(ys))
+        self.bounds[kernel] = bounds
+        return bounds
+
+    def covers(self, x, y):
+        """Return True if the cell at x, y is opaque."""
+        return (0 <= x < self.width and 0 <= y < self.height and
+                self.chars[y * self.width + x] != '\0')
+
+    def lines(self):
+        """Return the characters of the frame as a list of lists."""
+        width = self.width
+        return [self.chars[start:start + width]
+                for start in xrange(0, width * self.height, width)]
+
+
+class Sprite(tuple):
+    """An immutable sequence of compiled frames.
+
+    A sprite can be shared by any number of actors and particles:
+    setting an actor's display to one uses its frames as they are
+    instead of compiling them again.
+    """
+    __slots__ = ()
+
+    @property
+    def width(self):
+        return self[0].width
+
+    @property
+    def height(self):
+        return self[0].height
+
+
+def compile_frames(display, fg=None, bg=None, inverted=False):
+    """Compile display into a list of Frames.
+
+    display is a frame or a list of frames.  A frame is either a
+    newline separated string or a list of lines, where each line is a
+    string or a list of characters and (char, fg, bg, inverted) tuples.
+    Plain characters take the fg, bg and inverted values passed in.
+    """
+    if not isinstance(display, list):
+        display = [display]
+    frames = []
+    for frame in display:
+        if isinstance(frame, basestring):
+            frame = frame.split('\n')
+        frames.append(Frame(frame, fg, bg, inverted))
+    return frames
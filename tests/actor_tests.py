@@ -23,13 +23,23 @@ import unittest
 import mox
 
 from jinxes import actor
+from jinxes import sprite
 
 
 class FakeApp(object):
+    def project_x(self, x, width):
+        return int(x)
+
+    def project_y(self, y, height):
+        return int(y)
+
     def notify_created(self, actor):
         pass
 
     def notify_updated(self, actor):
+        self.updates = getattr(self, 'updates', 0) + 1
+
+    def notify_moving(self, actor):
         pass
 
     def notify_moved(self, actor):
@@ -38,6 +48,12 @@ class FakeApp(object):
     def notify_visible(self, actor):
         pass
 
+    def notify_reordering(self, actor):
+        self.reordering = actor.sort_key
+
+    def notify_reordered(self, actor):
+        self.reordered = actor.sort_key
+
 
 class ActorTestCase(unittest.TestCase):
     """Test actor functionality.
@@ -52,6 +68,8 @@ class ActorTestCase(unittest.TestCase):
 
     def test_create_actor(self):
         app = self.mox.CreateMockAnything()
+        app.project_x(0, 1).AndReturn(0)
+        app.project_y(0, 1).AndReturn(0)
         app.notify_created(mox.IgnoreArg())
         app.notify_updated(mox.IgnoreArg())
         app.notify_visible(mox.IgnoreArg())
@@ -93,3 +111,85 @@ class ActorTestCase(unittest.TestCase):
                    'o\0')
         actor1 = actor.Actor(FakeApp(), 0, 0, display)
         self.assertEqual(actor1.vsize, 3)
+
+    def test_opaque(self):
+        display = ('o\0\n'
+                   '\0o')
+        actor1 = actor.Actor(FakeApp(), 0, 0, display)
+        self.assertEqual(actor1.opaque, ((0, 0), (1, 1)))
+        self.assertEqual(actor1.collisions(2, 3), set([(2, 3), (3, 4)]))
+        self.assertEqual(actor1.get_ch(5, 5), ('\0', None, None, False))
+
+    def test_collision_kernel(self):
+
+        class Wide(actor.Actor):
+            COLLISION_KERNEL = ((0, 0), (1, 0))
+
+        actor1 = Wide(FakeApp(), 0, 0, 'o\0o')
+        self.assertEqual(actor1.collision_mask, ((0, 0), (1, 0), (2, 0),
+                                                 (3, 0)))
+        self.assertEqual(actor1.collisions(1, 1),
+                         set([(1, 1), (2, 1), (3, 1), (4, 1)]))
+
+    def test_shared_sprite(self):
+        shared = sprite.Sprite(sprite.compile_frames(['ab', 'cd']))
+        first = actor.Actor(self.app, 0, 0, shared)
+        second = actor.Actor(self.app, 1, 1, shared)
+        self.assertTrue(first._frames is shared)
+        self.assertTrue(second._frames is shared)
+        self.assertEqual(first.frames, 2)
+        self.assertEqual(second.display, [['a', 'b']])
+
+    def test_sort_key(self):
+        app = FakeApp()
+        actor1 = actor.Actor(app, 0, 0, 'o', z=1)
+        actor2 = actor.Actor(app, 0, 0, 'o')
+        actor3 = actor.Actor(app, 0, 0, 'o')
+        self.assertEqual(sorted([actor1, actor3, actor2]),
+                         [actor2, actor3, actor1])
+        old_key = actor2.sort_key
+        actor2.z = 2
+        self.assertEqual(app.reordering, old_key)
+        self.assertEqual(app.reordered, actor2.sort_key)
+        self.assertTrue(actor2.sort_key > actor1.sort_key)
+
+
+class ParticleTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(ParticleTestCase, self).setUp()
+        self.app = FakeApp()
+        self.frames = sprite.compile_frames(['ab', 'cd'])
+
+    def test_create_particle(self):
+        particle1 = actor.Particle(self.app, 1.5, 2.5, self.frames)
+        particle2 = actor.Particle(self.app, 0, 0, self.frames, z=1)
+        self.assertEqual(particle2.id, particle1.id + 1)
+        self.assertTrue(particle1 < particle2)
+        self.assertTrue(particle1.compiled_frame is self.frames[0])
+        self.assertEqual((particle1.screenx, particle1.screeny), (1, 2))
+        self.assertFalse(hasattr(particle1, '__dict__'))
+
+    def test_commit(self):
+        particle = actor.Particle(self.app, 0, 0, self.frames)
+        particle.x = 3.5
+        particle.animate(None, 1.5)
+        self.assertEqual(particle.screenx, 0)
+        self.assertEqual(particle.get_ch(0, 0)[0], 'a')
+        particle.commit(None)
+        self.assertEqual(particle.screenx, 3)
+        self.assertEqual(particle.get_ch(0, 0)[0], 'c')
+        self.assertEqual(self.app.updates, 1)
+        particle.x = 3.75
+        particle.commit(None)
+        self.assertEqual(self.app.updates, 1)
+
+    def test_tick(self):
+        particle = actor.Particle(self.app, 0, 0, self.frames)
+        particle.xvel = 2.0
+        particle.frame_rate = 3.0
+        particle.tick(None, 0.5)
+        self.assertEqual((particle.x, particle.screenx), (1.0, 1))
+        self.assertEqual(particle.frame, 1)
+        particle.tick(None, 0.25)
+        self.assertEqual(particle.frame, 0)
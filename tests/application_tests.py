@@ -132,13 +132,19 @@ class FakeScr(object):
 class FakeActor(object):
     def __init__(self, actor_id):
         self.id = actor_id
+        self.sort_key = actor_id
         self.x = 0
         self.y = 0
+        self.screenx = 0
+        self.screeny = 0
         self.hsize = 1
         self.vsize = 1
+        self.opaque = ((0, 0),)
+        self.transparent = False
+        self.custom_get_ch = True
 
     def get_ch(self, x, y):
-        return 'o'
+        return ('o', None, None, False)
 
 
 class ApplicationTestCase(unittest.TestCase):
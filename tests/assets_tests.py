@@ -0,0 +1,104 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests for the jinxes assets module
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from jinxes import assets
+from jinxes import sprite
+
+
+ART = ["""
+X/\\
+/__\\""", """
+X..
+/__\\"""]
+COLORS = """
+ rr
+bbbb"""
+COLOR_MAP = {'r': 1, 'b': 4}
+
+
+class AssetsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.addCleanup(assets._loaded.clear)
+        assets._loaded.clear()
+
+    def test_parse_sprite(self):
+        parsed = assets.parse_sprite(ART, COLORS, COLOR_MAP, fg=7,
+                                     transparent='X')
+        self.assertTrue(isinstance(parsed, sprite.Sprite))
+        self.assertEqual(len(parsed), 2)
+        self.assertEqual((parsed.width, parsed.height), (4, 2))
+        frame = parsed[1]
+        self.assertEqual(frame.get(0, 0), ('\0', 7, None, False))
+        self.assertEqual(frame.get(1, 0), ('.', 1, None, False))
+        self.assertEqual(frame.get(3, 1), ('\\', 4, None, False))
+        self.assertEqual(frame.opaque[0], (1, 0))
+
+    def test_load_sprite_is_shared(self):
+        first = assets.load_sprite(ART, COLORS, COLOR_MAP)
+        self.assertTrue(assets.load_sprite(ART, COLORS, COLOR_MAP) is first)
+        self.assertFalse(assets.load_sprite(ART, COLORS, {'r': 2}) is first)
+
+    def test_disk_cache(self):
+        first = assets.load_sprite(ART, COLORS, COLOR_MAP, fg=7,
+                                   cache_dir=self.cache_dir)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        assets._loaded.clear()
+
+        def parse(*args):
+            raise AssertionError('parsed a cached sprite')
+
+        self.addCleanup(setattr, assets, 'parse_sprite', assets.parse_sprite)
+        assets.parse_sprite = parse
+        cached = assets.load_sprite(ART, COLORS, COLOR_MAP, fg=7,
+                                    cache_dir=self.cache_dir)
+        self.assertTrue(isinstance(cached, sprite.Sprite))
+        self.assertEqual([frame.__getstate__() for frame in cached],
+                         [frame.__getstate__() for frame in first])
+        self.assertEqual(cached[0].mask_bounds(sprite.IDENTITY_KERNEL),
+                         (0, 0, 3, 1))
+
+    def test_unusable_cache_dir(self):
+        path = os.path.join(self.cache_dir, 'file')
+        open(path, 'w').close()
+        loaded = assets.load_sprite(ART, cache_dir=path)
+        self.assertEqual(len(loaded), 2)
+
+    def test_cached(self):
+        built = []
+
+        def build():
+            built.append(True)
+            return {('a', 'b'): ['c']}
+
+        self.assertEqual(assets.cached('model', self.cache_dir, build),
+                         {('a', 'b'): ['c']})
+        self.assertEqual(assets.cached('model', self.cache_dir, build),
+                         {('a', 'b'): ['c']})
+        self.assertEqual(len(built), 1)
+        assets.cached('model', None, build)
+        self.assertEqual(len(built), 2)
@@ -0,0 +1,61 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests for the jinxes benchmark module
+"""
+
+import os
+import unittest
+
+from jinxes import benchmark
+from jinxes import screen
+
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+
+class BenchmarkTestCase(unittest.TestCase):
+
+    def test_fake_clock(self):
+        clock = benchmark.FakeClock(0.5, 1.0)
+        self.assertEqual(clock(), 1.5)
+        self.assertEqual(clock(), 2.0)
+
+    def test_percentile(self):
+        values = range(1, 101)
+        self.assertEqual(benchmark.percentile(values, 99), 99)
+        self.assertEqual(benchmark.percentile(values, 100), 100)
+        self.assertEqual(benchmark.percentile([3.0], 99), 3.0)
+        self.assertEqual(benchmark.percentile([], 99), 0.0)
+
+    def test_replay_is_deterministic(self):
+        game = benchmark.load_scenario('tag-the-flag', ROOT)
+        dumps = []
+        for i in xrange(2):
+            app = screen.run(game, 20, 40, frames=30, seed=7,
+                             clock=benchmark.FakeClock())
+            dumps.append(app.win.dump())
+        self.assertEqual(dumps[0], dumps[1])
+
+    def test_run_benchmark(self):
+        game = benchmark.load_scenario('tag-the-flag', ROOT)
+        result = benchmark.run_benchmark(game, frames=10, width=40,
+                                         height=20, NUM_MONSTERS=5)
+        self.assertEqual(result['frames'], 10)
+        self.assertEqual(result['actors'], 7)
+        self.assertEqual(result['attrs'], {'NUM_MONSTERS': 5})
+        self.assertTrue(result['frame_p99_ms'] >= result['frame_mean_ms'])
@@ -0,0 +1,90 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests for the jinxes compositor module
+"""
+
+import unittest
+
+from jinxes import actor
+from jinxes import application
+from jinxes import compositor
+from jinxes import screen
+
+
+class Recolored(actor.Actor):
+    def get_ch(self, x, y):
+        ch, fg, bg, inverted = super(Recolored, self).get_ch(x, y)
+        return ch, 99, bg, inverted
+
+
+class Scene(application.Application):
+    def initialize(self, current):
+        super(Scene, self).initialize(current)
+        actor.Actor(self, 0.5, 0.5, ['abcdef\nghijkl\nmnopqr'], current,
+                    fg=2, bg=3)
+        actor.Actor(self, 0.4, 0.4, u'\u263a\0x', current, fg=5, z=1)
+        inverted = actor.Actor(self, 0.6, 0.6, 'inv', current, fg=6, bg=7,
+                               inverted=True, z=2)
+        cursor = actor.Actor(self, 0.5, 0.5, 'C', current, bg=4, z=3)
+        cursor.transparent = True
+        Recolored(self, 0.1, 0.1, 'rr', current)
+
+
+@unittest.skipIf(compositor.numpy is None, 'numpy is not installed')
+class NumpyCompositorTestCase(unittest.TestCase):
+
+    def test_matches_get_location(self):
+        app = screen.run(Scene, 8, 10, frames=1)
+        dirty = dict(((x, y), True) for x in xrange(10) for y in xrange(8))
+        expected = app.composite(dirty)
+        result = compositor.NumpyCompositor(app).composite(dirty)
+        self.assertEqual(result, expected)
+        self.assertEqual(len(result), 80)
+
+    def test_partial_region(self):
+        app = screen.run(Scene, 8, 10, frames=1)
+        dirty = {(5, 4): True, (2, 3): True, (9, 0): True}
+        result = compositor.NumpyCompositor(app).composite(dirty)
+        self.assertEqual([(x, y) for x, y, cell in result],
+                         [(9, 0), (2, 3), (5, 4)])
+        self.assertEqual(result, app.composite(dirty))
+
+    def test_redraw(self):
+
+        class NumpyScene(Scene):
+            COMPOSITOR = compositor.NUMPY_COMPOSITOR
+
+        expected = screen.run(Scene, 8, 10, frames=1)
+        app = screen.run(NumpyScene, 8, 10, frames=1)
+        self.assertTrue(isinstance(app.compositor,
+                                   compositor.NumpyCompositor))
+        self.assertEqual(app.front, expected.front)
+
+    def test_updated_frame_planes_are_patched(self):
+        app = screen.run(Scene, 8, 10, frames=1)
+        numpy_compositor = compositor.NumpyCompositor(app)
+        frame = actor.Actor(app, 0.5, 0.5, ['ab\0\ncdx'], None, fg=2,
+                            bg=3).compiled_frame
+        planes = numpy_compositor._frame_planes(frame)
+        frame.update(1, 0, [[('X', None, 9, True), '\0'], 'y'], fg=4)
+        frame.update(0, 1, '\0')
+        self.assertTrue(numpy_compositor._frame_planes(frame) is planes)
+        self.assertEqual(frame.stale_planes, [])
+        rebuilt = numpy_compositor._frame_planes(frame.copy())
+        for plane, expected in zip(planes, rebuilt):
+            self.assertEqual(plane.tolist(), expected.tolist())
@@ -0,0 +1,155 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests for the jinxes group module
+"""
+
+import random
+import unittest
+
+from jinxes import actor
+from jinxes import application
+from jinxes import group
+from jinxes import screen
+
+
+TIMES = [i * 0.0625 for i in xrange(200)]
+
+
+class Bouncers(application.Application):
+    GROUPED = True
+    COLLIDES = True
+
+    def initialize(self, current):
+        super(Bouncers, self).initialize(current)
+        rand = random.Random(1)
+        self.herd = group.ActorGroup(self)
+        self.bouncers = []
+        for i in xrange(20):
+            bouncer = actor.Actor(self, rand.random(), rand.random(),
+                                  ['ab\ncd', 'ef\ngh', 'ij\nkl'], current)
+            bouncer.xvel = rand.uniform(-2.0, 2.0)
+            bouncer.yvel = rand.choice((0.0, rand.uniform(-2.0, 2.0)))
+            bouncer.frame_rate = rand.uniform(0.0, 40.0)
+            bouncer.bordered = i % 3 != 0
+            bouncer.collides = self.COLLIDES and i % 2 == 0
+            self.bouncers.append(bouncer)
+            if self.GROUPED:
+                self.herd.add(bouncer)
+
+    def collide(self, actor, other, current, collisions, floatx, floaty):
+        actor.xvel = -actor.xvel
+        other.yvel = -other.yvel
+        return other.frame % 2 == 0
+
+
+class Ungrouped(Bouncers):
+    GROUPED = False
+
+
+class Passing(Bouncers):
+    COLLIDES = False
+
+
+class PassingUngrouped(Passing):
+    GROUPED = False
+
+
+class ActorGroupTestCase(unittest.TestCase):
+
+    def _state(self, app):
+        return [(bouncer._frame, bouncer.x, bouncer.y, bouncer.xvel,
+                 bouncer.yvel, bouncer.screenx, bouncer.screeny)
+                for bouncer in app.bouncers]
+
+    def test_matches_individual_ticks(self):
+        grouped = screen.run(Passing, 12, 30, frames=60,
+                             clock=iter(TIMES).next)
+        expected = screen.run(PassingUngrouped, 12, 30, frames=60,
+                              clock=iter(TIMES).next)
+        self.assertEqual(self._state(grouped), self._state(expected))
+        self.assertEqual(grouped.front, expected.front)
+
+    @unittest.skipIf(group.numpy is None, 'numpy is not installed')
+    def test_collisions(self):
+        app = screen.run(Bouncers, 12, 30, frames=60,
+                         clock=iter(TIMES).next)
+        for bouncer in app.bouncers:
+            self.assertEqual((bouncer.screenx, bouncer.screeny),
+                             (app.project_x(bouncer.x, bouncer.hsize),
+                              app.project_y(bouncer.y, bouncer.vsize)))
+            self.assertEqual(app.footprints.get(bouncer.id, frozenset()),
+                             frozenset((bouncer.screenx + x,
+                                        bouncer.screeny + y)
+                                       for x, y in bouncer.opaque
+                                       if 0 <= bouncer.screenx + x < 30 and
+                                          0 <= bouncer.screeny + y < 12))
+
+    @unittest.skipIf(group.numpy is None, 'numpy is not installed')
+    def test_refused_move(self):
+
+        class Walled(application.Application):
+            def initialize(self, current):
+                super(Walled, self).initialize(current)
+                self.wall = actor.Actor(self, 0.55, 0.5, '#', current)
+                self.herd = group.ActorGroup(self)
+                self.ball = actor.Actor(self, 0.45, 0.5, 'o', current)
+                self.ball.xvel = 1.0
+                self.herd.add(self.ball)
+                self.hits = []
+
+            def collide(self, actor, other, current, collisions, floatx,
+                        floaty):
+                self.hits.append((actor, other))
+                actor.xvel = -actor.xvel
+                return False
+
+        app = screen.run(Walled, 1, 10, frames=2, clock=iter(TIMES).next)
+        self.assertEqual(app.hits, [(app.ball, app.wall)])
+        self.assertEqual((app.ball.x, app.ball.screenx), (0.45, 4))
+        self.assertEqual(app.ball.xvel, -1.0)
+        self.assertEqual(app.win.row(0), u'    o#    ')
+
+    @unittest.skipIf(group.numpy is None, 'numpy is not installed')
+    def test_members_use_group_arrays(self):
+        app = screen.run(Bouncers, 12, 30, frames=1)
+        bouncer = app.bouncers[1]
+        self.assertFalse(bouncer.id in app.active)
+        bouncer.xvel = 0.25
+        self.assertEqual(app.herd.xvel[bouncer.index], 0.25)
+        app.herd.y[bouncer.index] = 0.5
+        self.assertEqual(bouncer.y, 0.5)
+        app.herd.remove(bouncer)
+        self.assertTrue(type(bouncer) is actor.Actor)
+        self.assertEqual((bouncer.xvel, bouncer.y), (0.25, 0.5))
+        self.assertTrue(bouncer.id in app.active)
+        bouncer.x = 0.5
+        self.assertEqual(bouncer.screenx, app.project_x(0.5, 2))
+        app.herd.step(1.0, 0.0)
+        self.assertEqual([member.index for member in app.herd], range(19))
+
+    def test_membership(self):
+        app = screen.run(Bouncers, 12, 30, frames=1)
+        self.assertEqual(app.groups, [app.herd])
+        self.assertEqual(len(app.herd), 20)
+        first = app.bouncers[0]
+        first.destroy()
+        self.assertFalse(first in app.herd)
+        self.assertEqual(first.group, None)
+        for bouncer in app.bouncers[1:]:
+            app.herd.remove(bouncer)
+        self.assertEqual(app.groups, [])
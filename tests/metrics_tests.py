@@ -0,0 +1,125 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests for the jinxes metrics module
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from jinxes import actor
+from jinxes import application
+from jinxes import screen
+
+
+class App(application.Application):
+    def initialize(self, current):
+        super(App, self).initialize(current)
+        if self.metrics is None:
+            self.enable_metrics(current, overlay=self.OVERLAY,
+                                interval=0.5)
+        self.ball = actor.Actor(self, 0.5, 0.8, 'o', current)
+        self.ball.xvel = 0.5
+
+    OVERLAY = False
+
+
+class MetricsTestCase(unittest.TestCase):
+    """Test frame metrics."""
+
+    def clock(self):
+        times = iter(i * 0.25 for i in xrange(100))
+        return lambda: next(times)
+
+    def test_reports(self):
+        app = screen.run(App, 10, 40, frames=6, clock=self.clock())
+        reports = list(app.metrics.reports)
+        self.assertEqual(len(reports), 2)
+        report = reports[0]
+        self.assertEqual(report['frames'], 3)
+        self.assertEqual(report['actors'], 1)
+        self.assertEqual(report['created'], 1)
+        self.assertTrue(report['writes'] > 0)
+        self.assertTrue(report['dirty'] >= report['composited'] >=
+                        report['cells'] > 0)
+        self.assertEqual(sorted(report['ms']),
+                         ['collisions', 'draw', 'frame', 'input', 'redraw',
+                          'refresh', 'tick'])
+
+    def test_threaded_reports_match(self):
+
+        class Ticked(App):
+            def tick(self, current, delta):
+                super(Ticked, self).tick(current, delta)
+                if current >= 2.5:
+                    raise application.Exit()
+
+        counters = ('frames', 'dirty', 'composited', 'cells', 'writes',
+                    'created', 'allocations')
+        reports = []
+        for threaded in (False, True):
+            app = screen.run(Ticked, 10, 40, threaded=threaded,
+                             clock=self.clock())
+            reports.append([tuple(report[counter] for counter in counters)
+                            for report in app.metrics.reports][:2])
+        self.assertEqual(len(reports[0]), 2)
+        self.assertEqual(reports[1], reports[0])
+
+    def test_json_dump(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        class Dumped(App):
+            METRICS_PATH = path
+
+        screen.run(Dumped, 10, 40, frames=6, clock=self.clock())
+        with open(path) as f:
+            reports = [json.loads(line) for line in f]
+        self.assertEqual([report['frames'] for report in reports], [3, 2])
+
+    def test_overlay(self):
+
+        class Shown(App):
+            OVERLAY = True
+
+        app = screen.run(Shown, 10, 40, frames=6, clock=self.clock())
+        self.assertTrue(app.win.row(0).startswith(u'  4.0 fps'))
+        self.assertEqual(len(app.actors), 2)
+        app.toggle_metrics(1.5)
+        self.assertEqual(len(app.actors), 1)
+        self.assertTrue(app.metrics is None)
+        self.assertFalse('redraw' in app.__dict__)
+
+    def test_overlay_stays_pinned_on_resize(self):
+
+        class Resized(App):
+            OVERLAY = True
+
+            def tick(self, current, delta):
+                super(Resized, self).tick(current, delta)
+                if current == 0.25:
+                    self.backend.resize(10, 20)
+
+        app = screen.run(Resized, 10, 40, frames=4, clock=self.clock())
+        self.assertEqual(app.width, 20)
+        self.assertEqual((app.metrics.overlay.screenx,
+                          app.metrics.overlay.screeny), (0, 0))
+        line = u''.join(app.metrics.overlay.display[0])
+        self.assertEqual(app.win.row(0), line[:20])
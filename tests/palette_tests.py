@@ -0,0 +1,115 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests for the jinxes palette module
+"""
+
+import unittest
+
+from jinxes import actor
+from jinxes import application
+from jinxes import palette
+from jinxes import screen
+
+
+class SmallBackend(screen.VirtualBackend):
+    COLOR_PAIRS = 4
+
+
+class PaletteTestCase(unittest.TestCase):
+
+    def test_brush_key(self):
+        self.assertEqual(palette.brush_key(0, 0), 0)
+        self.assertEqual(palette.brush_key(1, 2), 258)
+        self.assertEqual(palette.brush_key(255, 255), 65535)
+
+    def test_get(self):
+        backend = SmallBackend()
+        brushes = palette.Palette(backend)
+        key = palette.brush_key(1, 2)
+        brush = brushes.get(key)
+        self.assertEqual(brushes.get(key), brush)
+        self.assertEqual(brushes.table[key], brush)
+        self.assertEqual(backend.colors(brush), (1, 2))
+        self.assertEqual(backend.pair_number(brush), 1)
+        self.assertEqual(len(brushes), 1)
+
+    def test_evicts_least_recently_unused(self):
+        backend = SmallBackend()
+        brushes = palette.Palette(backend)
+        brushes.pin(0)
+        brushes.get(1)
+        brushes.get(2)
+        brushes.acquire(1, 2)
+        brushes.acquire(2)
+        brushes.release(2)
+        brushes.release(1, 2)
+        brush = brushes.get(3)
+        self.assertEqual(backend.colors(brush), (0, 3))
+        self.assertFalse(2 in brushes)
+        self.assertEqual(brushes.table[2], 0)
+        self.assertTrue(1 in brushes)
+        self.assertEqual(brushes.evictions, 1)
+
+    def test_out_of_brushes(self):
+        brushes = palette.Palette(SmallBackend())
+        brushes.pin(0)
+        for key in (1, 2):
+            brushes.get(key)
+            brushes.acquire(key)
+        self.assertRaises(Exception, brushes.get, 3)
+
+    def test_reset(self):
+        brushes = palette.Palette(SmallBackend())
+        brushes.pin(0)
+        brushes.get(1)
+        brushes.acquire(1)
+        brushes.reset(0, 10)
+        self.assertEqual(brushes.refs[0], 10)
+        self.assertEqual(brushes.refs[1], 0)
+        self.assertEqual(brushes.unused.keys(), [1])
+
+
+class RedrawTestCase(unittest.TestCase):
+
+    def test_reuses_pairs_for_new_colors(self):
+        colors = []
+
+        class Shade(actor.Actor):
+            def get_ch(self, x, y):
+                ch, fg, bg, inverted = super(Shade, self).get_ch(x, y)
+                return ch, self.app.shade, bg, inverted
+
+        class App(application.Application):
+            def initialize(self, current):
+                self.shade = 20
+                super(App, self).initialize(current)
+                self.dot = Shade(self, 0.5, 0.5, 'ab', current)
+
+            def tick(self, current, delta):
+                self.shade += 1
+                self.dot.animate(current, 0)
+
+            def redraw(self, current):
+                super(App, self).redraw(current)
+                colors.append(self.backend.colors(self.win.cell(1, 1)[1]))
+
+        backend = SmallBackend(3, 4, frames=30)
+        app = App(backend.scr, backend=backend)
+        self.assertEqual(colors[-1], (app.shade, App.DEFAULT_BG_COLOR))
+        self.assertEqual([fg for fg, bg in colors], range(21, 51))
+        self.assertTrue(app.palette.evictions > 0)
@@ -0,0 +1,61 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests for the jinxes sample apps
+"""
+
+import os
+import unittest
+
+from jinxes import benchmark
+from jinxes import screen
+
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+
+class ViNavTestCase(unittest.TestCase):
+
+    def test_resize_keeps_live_words(self):
+        shrunk = []
+
+        class Resized(benchmark.load_scenario('learn-vi-nav', ROOT)):
+            CORPUS = os.path.join(ROOT, 'words.txt')
+
+            def tick(self, current, delta):
+                super(Resized, self).tick(current, delta)
+                if not shrunk and len(self.words) >= 20:
+                    shrunk.append(sorted(self.words))
+                    self.backend.resize(20, 50)
+
+        app = screen.run(Resized, 20, 60, frames=40, seed=1,
+                         clock=benchmark.FakeClock())
+        self.assertEqual(app.width, 50)
+        live = [word for word in app.words.values()
+                if word.id in shrunk[0]]
+        self.assertTrue(len(live) >= 20)
+        self.assertEqual([u''.join(line) for line in app.bg.display],
+                         app.display)
+        # NOTE(vish): newer words are spliced over older ones, so walk
+        #             them newest first and skip cells already checked
+        covered = set()
+        for word in sorted(app.words.values(), key=lambda word: -word.seq):
+            for i, char in enumerate(word.text):
+                x = word.screenx + i
+                if 0 <= x < app.width and (x, word.screeny) not in covered:
+                    covered.add((x, word.screeny))
+                    self.assertEqual(app.display[word.screeny][x], char)
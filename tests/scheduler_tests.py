@@ -0,0 +1,70 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests for the jinxes scheduler module
+"""
+
+import unittest
+
+from jinxes import scheduler
+
+
+class SchedulerTestCase(unittest.TestCase):
+    """Test timed events."""
+
+    def setUp(self):
+        self.scheduler = scheduler.Scheduler()
+        self.calls = []
+
+    def record(self, now, name):
+        self.calls.append((now, name))
+
+    def test_runs_due_events_in_order(self):
+        self.scheduler.schedule(2.0, self.record, 'b')
+        self.scheduler.schedule(1.0, self.record, 'a')
+        self.scheduler.schedule(2.0, self.record, 'c')
+        self.scheduler.schedule(3.0, self.record, 'd')
+        self.scheduler.run(0.5)
+        self.assertEqual(self.calls, [])
+        self.scheduler.run(2.0)
+        self.assertEqual(self.calls, [(2.0, 'a'), (2.0, 'b'), (2.0, 'c')])
+        self.assertEqual(len(self.scheduler), 1)
+        self.assertEqual(self.scheduler.next_time(), 3.0)
+
+    def test_cancel(self):
+        event = self.scheduler.schedule(1.0, self.record, 'a')
+        self.scheduler.schedule(2.0, self.record, 'b')
+        self.scheduler.cancel(event)
+        self.scheduler.cancel(event)
+        self.assertEqual(len(self.scheduler), 1)
+        self.assertEqual(self.scheduler.next_time(), 2.0)
+        self.scheduler.run(5.0)
+        self.assertEqual(self.calls, [(5.0, 'b')])
+        self.assertEqual(self.scheduler.next_time(), None)
+
+    def test_events_scheduled_while_running(self):
+
+        def repeat(now, when):
+            self.calls.append(when)
+            if when < 3:
+                self.scheduler.schedule(when + 1, repeat, when + 1)
+
+        self.scheduler.schedule(1, repeat, 1)
+        self.scheduler.run(2)
+        self.assertEqual(self.calls, [1, 2])
+        self.scheduler.run(10)
+        self.assertEqual(self.calls, [1, 2, 3])
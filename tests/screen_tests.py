@@ -0,0 +1,315 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests for the jinxes screen module
+"""
+
+import curses
+import itertools
+import threading
+import unittest
+
+from jinxes import actor
+from jinxes import application
+from jinxes import screen
+
+
+class VirtualScreenTestCase(unittest.TestCase):
+    """Test the in-memory window."""
+
+    def test_addstr_wraps(self):
+        scr = screen.VirtualScreen(2, 3)
+        scr.addstr(0, 1, 'abcd', 5)
+        self.assertEqual(scr.row(0), u' ab')
+        self.assertEqual(scr.row(1), u'cd ')
+        self.assertEqual(scr.cell(1, 0), (u'a', 5))
+
+    def test_addstr_bottom_right(self):
+        scr = screen.VirtualScreen(2, 3)
+        self.assertRaises(curses.error, scr.addstr, 1, 2, 'x')
+        self.assertEqual(scr.cell(2, 1), (u'x', 0))
+        self.assertRaises(curses.error, scr.addstr, 2, 0, 'x')
+
+    def test_getch_script(self):
+        scr = screen.VirtualScreen(keys=['q', None, curses.KEY_RESIZE],
+                                   frames=4)
+        self.assertEqual(scr.getch(), ord('q'))
+        self.assertEqual(scr.getch(), curses.ERR)
+        self.assertEqual(scr.getch(), curses.KEY_RESIZE)
+        self.assertEqual(scr.getch(), curses.ERR)
+        self.assertRaises(application.Exit, scr.getch)
+
+
+class HeadlessTestCase(unittest.TestCase):
+    """Run whole applications against the virtual backend."""
+
+    def clock(self, step):
+        times = itertools.count()
+        return lambda: next(times) * step
+
+    def test_run_draws_actors(self):
+
+        class App(application.Application):
+            def initialize(self, current):
+                super(App, self).initialize(current)
+                self.dot = actor.Actor(self, 0.5, 0.5, 'o', current, fg=3)
+
+        app = screen.run(App, 5, 5, frames=2)
+        self.assertEqual(app.win.row(2), u'  o  ')
+        self.assertEqual(app.backend.colors(app.win.cell(2, 2)[1]),
+                         (3, application.Application.DEFAULT_BG_COLOR))
+        self.assertEqual(app.scr.polls, 2)
+
+    def test_run_scripted_input(self):
+
+        class App(application.Application):
+            def handle_q(self, current):
+                raise application.Exit()
+
+        app = screen.run(App, keys=[None, None, 'q', None])
+        self.assertEqual(app.scr.polls, 3)
+
+    def test_frame_pacing(self):
+        times = iter([0.0, 0.0, 0.25, 0.5, 0.75, 2.0, 2.0, 2.5])
+
+        class App(application.Application):
+            FPS = 2
+
+        app = screen.run(App, frames=4, clock=lambda: next(times))
+        self.assertEqual(app.scr.waits, [0.25, 0.25, 0.5])
+
+    def test_no_pacing_by_default(self):
+        app = screen.run(application.Application, frames=3)
+        self.assertEqual(app.scr.waits, [])
+
+    def test_redraw_spans(self):
+
+        class App(application.Application):
+            def initialize(self, current):
+                super(App, self).initialize(current)
+                actor.Actor(self, 0.5, 0.5, ['ab\ncd', 'ef\ngh'], current)
+                actor.Actor(self, 0.5, 0.8, 'xy', current, fg=3)
+
+        app = screen.run(App, 5, 6, frames=1)
+        self.assertEqual(app.win.dump(), u'      \n      \n  ab  \n'
+                                         u'  cd  \n  xy  ')
+        self.assertEqual(app.win.writes, 3)
+
+    def test_redraw_skips_unchanged_cells(self):
+        written = []
+
+        class App(application.Application):
+            def initialize(self, current):
+                super(App, self).initialize(current)
+                self.dot = actor.Actor(self, 0.5, 0.5, 'ab', current)
+
+            def tick(self, current, delta):
+                self.dot.animate(current, 0)
+
+            def redraw(self, current):
+                super(App, self).redraw(current)
+                written.append(self.cells_written)
+
+        app = screen.run(App, 3, 4, frames=3)
+        self.assertEqual(written, [2, 0, 0])
+        self.assertEqual(app.win.writes, 1)
+
+    def test_location_cache_diff(self):
+        changes = []
+
+        class App(application.Application):
+            def initialize(self, current):
+                super(App, self).initialize(current)
+                self.bar = actor.Actor(self, 0.0, 0.5, ['abc', 'def'],
+                                       current)
+                self.bar.bordered = False
+                self.bar.frame_rate = 0.0
+                index = self.actors_by_location
+                insert, remove = index.insert, index.remove
+
+                def counted(method, name):
+                    def wrapper(*args):
+                        changes.append(name)
+                        return method(*args)
+                    return wrapper
+
+                index.insert = counted(insert, 'insert')
+                index.remove = counted(remove, 'remove')
+
+            def tick(self, current, delta):
+                del changes[:]
+                self.bar.animate(current, 1)
+                self.bar.move(current, self.bar.x + 1.0 / self.width,
+                              self.bar.y)
+
+        app = screen.run(App, 3, 8, frames=2)
+        self.assertEqual(sorted(changes), ['insert', 'remove'])
+        self.assertEqual(app.win.row(1), u' def    ')
+
+    def test_static_actors_sleep(self):
+        ticked = []
+
+        class Counted(actor.Actor):
+            def move(self, current, x, y):
+                ticked.append(self.name)
+                super(Counted, self).move(current, x, y)
+
+        class App(application.Application):
+            def initialize(self, current):
+                super(App, self).initialize(current)
+                self.rock = Counted(self, 0.5, 0.5, 'o', current)
+                self.rock.name = 'rock'
+                self.ball = Counted(self, 0.2, 0.5, 'o', current)
+                self.ball.name = 'ball'
+                self.ball.xvel = 0.1
+
+        app = screen.run(App, 5, 10, frames=3)
+        self.assertEqual(ticked, ['rock', 'ball', 'ball', 'ball'])
+        self.assertTrue(app.rock.sleeping)
+        self.assertEqual(app.active.keys(), [app.ball.id])
+        app.rock.yvel = 0.1
+        self.assertFalse(app.rock.sleeping)
+        self.assertEqual(app.active.keys(), [app.rock.id, app.ball.id])
+
+    def test_sleeping_actors_animate_on_schedule(self):
+        ticked = []
+
+        class Counted(actor.Actor):
+            def move(self, current, x, y):
+                ticked.append(current)
+                super(Counted, self).move(current, x, y)
+
+        class App(application.Application):
+            def initialize(self, current):
+                super(App, self).initialize(current)
+                self.blinker = Counted(self, 0.5, 0.5, ['a', 'b'], current)
+                self.blinker.frame_rate = 2.0
+
+        times = iter([0.0, 0.1, 0.3, 0.5, 0.7, 0.9, 1.1])
+        app = screen.run(App, 3, 3, frames=6, clock=lambda: next(times))
+        self.assertEqual(ticked, [0.0])
+        self.assertTrue(app.blinker.sleeping)
+        self.assertEqual(app.blinker.frame, 1)
+        self.assertEqual(app.blinker.updated, 0.5)
+        self.assertEqual(app.win.row(1), u' b ')
+        app.blinker.xvel = 0.1
+        self.assertEqual(len(app.scheduler), 0)
+
+    def test_off_screen_clipping_and_retirement(self):
+
+        class App(application.Application):
+            def initialize(self, current):
+                super(App, self).initialize(current)
+                self.edge = actor.Actor(self, 0.0, 0.5, 'abcd', current)
+                self.edge.bordered = False
+                self.gone = actor.Actor(self, 0.9, 0.5, 'xy', current)
+                self.gone.bordered = False
+                self.gone.xvel = 1.0
+                self.gone.retire_margin = (0.0, 0.0, 0.5, 0.0)
+
+        app = screen.run(App, 3, 8, frames=1)
+        self.assertEqual(sorted(app.footprints[app.edge.id]),
+                         [(0, 1), (1, 1), (2, 1)])
+        self.assertEqual(app.win.row(1), u'bcd   xy')
+        app = screen.run(App, 3, 8, frames=5, clock=self.clock(0.1))
+        self.assertEqual(app.gone.screenx, 9)
+        self.assertTrue(app.gone.id in app.actors)
+        app = screen.run(App, 3, 8, frames=12, clock=self.clock(0.1))
+        self.assertEqual(app.actors.keys(), [app.edge.id])
+
+    def test_update_cells(self):
+        dirty = []
+
+        class App(application.Application):
+            def initialize(self, current):
+                super(App, self).initialize(current)
+                self.page = actor.Actor(self, 0.5, 0.5,
+                                        '\n'.join(['.' * 6] * 3),
+                                        current, fg=3)
+                self.page.update_cells(current, 1, 1, ['ab'])
+
+            def tick(self, current, delta):
+                self.page.update_cells(current, 4, 2, 'xyz')
+
+            def redraw(self, current):
+                self.flush_location_cache()
+                dirty.append(len(self.dirty_by_location))
+                super(App, self).redraw(current)
+
+        app = screen.run(App, 3, 6, frames=2)
+        self.assertEqual(dirty, [18, 2])
+        self.assertEqual(app.win.dump(), u'......\n.ab...\n....xy')
+        self.assertEqual(app.page.display, [list('......'), list('.ab...'),
+                                            list('....xy')])
+
+    def test_resize_is_coalesced_and_keeps_actors(self):
+        resized = []
+
+        class App(application.Application):
+            def initialize(self, current):
+                super(App, self).initialize(current)
+                self.frames = 0
+                self.dot = actor.Actor(self, 0.5, 0.5, 'o', current)
+
+            def tick(self, current, delta):
+                self.frames += 1
+                if self.frames in (2, 3, 4):
+                    self.backend.resize(5, 10 + self.frames * 2)
+
+            def resized(self, current):
+                resized.append((current, (self.width, self.height)))
+
+        app = screen.run(App, 3, 10, frames=10, clock=self.clock(0.05))
+        self.assertEqual([size for current, size in resized], [(18, 5)])
+        self.assertAlmostEqual(resized[0][0], 0.3)
+        self.assertEqual(app.actors.keys(), [app.dot.id])
+        self.assertEqual((app.dot.screenx, app.dot.screeny), (9, 2))
+        self.assertEqual(app.win.row(2), u'         o        ')
+
+    def test_threaded(self):
+        threads = []
+
+        class App(application.Application):
+            def initialize(self, current):
+                super(App, self).initialize(current)
+                self.ticks = 0
+                self.ball = actor.Actor(self, 0.1, 0.5, 'o', current)
+                self.ball.bordered = False
+                self.ball.xvel = 1.0
+
+            def handle_x(self, current):
+                threads.append(threading.current_thread().name)
+
+            def tick(self, current, delta):
+                super(App, self).tick(current, delta)
+                self.ticks += 1
+                if self.ticks == 5:
+                    raise application.Exit()
+
+        app = screen.run(App, 3, 10, keys=['x'], threaded=True,
+                         clock=self.clock(0.1))
+        self.assertEqual(threads, ['jinxes-simulation'])
+        self.assertEqual(app.ball.screenx, 5)
+        self.assertEqual(app.win.row(1), u'    o     ')
+
+    def test_threaded_failure(self):
+
+        class App(application.Application):
+            def tick(self, current, delta):
+                raise ValueError('broken tick')
+
+        self.assertRaises(ValueError, screen.run, App, threaded=True)
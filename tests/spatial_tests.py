@@ -0,0 +1,107 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests for the jinxes spatial module
+"""
+
+import unittest
+
+from jinxes import actor
+from jinxes import application
+from jinxes import screen
+from jinxes import spatial
+
+
+class FakeActor(object):
+    def __init__(self, actor_id, z=0):
+        self.id = actor_id
+        self.sort_key = z * 100 + actor_id
+
+
+class SpatialGridTestCase(unittest.TestCase):
+
+    def test_query(self):
+        grid = spatial.SpatialGrid(bucket_size=4)
+        actor1 = FakeActor(1)
+        actor2 = FakeActor(2)
+        grid.insert(actor1, (0, 0, 9, 1))
+        grid.insert(actor2, (6, 6, 6, 6))
+        self.assertEqual(len(grid), 2)
+        self.assertEqual(grid.query((8, 1, 8, 1)), [actor1])
+        self.assertEqual(grid.query((5, 5, 6, 6)), [actor2])
+        self.assertEqual(grid.query((5, 5, 5, 5)), [])
+        self.assertEqual(len(grid.query((0, 0, 20, 20))), 2)
+
+    def test_move_and_remove(self):
+        grid = spatial.SpatialGrid(bucket_size=4)
+        actor1 = FakeActor(1)
+        grid.insert(actor1, (0, 0, 0, 0))
+        grid.insert(actor1, (10, 10, 10, 10))
+        self.assertEqual(grid.query((0, 0, 0, 0)), [])
+        self.assertEqual(grid.query((10, 10, 10, 10)), [actor1])
+        grid.remove(actor1)
+        grid.remove(actor1)
+        self.assertFalse(actor1 in grid)
+        self.assertEqual(grid.buckets, {})
+
+
+class ScreenIndexTestCase(unittest.TestCase):
+
+    def test_lazy_cells(self):
+        index = spatial.ScreenIndex(4, 3)
+        self.assertEqual(index[(3, 2)], ())
+        self.assertRaises(KeyError, index.__getitem__, (4, 0))
+        self.assertRaises(KeyError, index.__getitem__, (-1, 0))
+        self.assertEqual(index.get((0, 3)), None)
+        self.assertEqual(index.occupied(), 0)
+
+    def test_insert_in_z_order(self):
+        index = spatial.ScreenIndex(4, 3)
+        actor1 = FakeActor(1, z=2)
+        actor2 = FakeActor(2, z=1)
+        actor3 = FakeActor(3, z=2)
+        for item in (actor1, actor2, actor3, actor1):
+            index.insert(1, 2, item)
+        self.assertEqual(index[(1, 2)], [actor2, actor1, actor3])
+        self.assertEqual(index.occupied(), 1)
+        for item in (actor1, actor2, actor3):
+            index.remove(1, 2, item)
+        self.assertEqual(index[(1, 2)], ())
+        self.assertEqual(index.cells, [None] * 12)
+        self.assertEqual(index.keys, [None] * 12)
+
+
+class CollisionTestCase(unittest.TestCase):
+
+    def test_try_move_collisions(self):
+        found = []
+
+        class App(application.Application):
+            def initialize(self, current):
+                super(App, self).initialize(current)
+                self.wall = actor.Actor(self, 0.5, 0.5, 'ab\ncd', current)
+                self.dot = actor.Actor(self, 0.1, 0.1, 'o', current)
+                self.far = actor.Actor(self, 0.9, 0.9, 'o', current)
+                self.dot.move(current, self.wall.x, self.wall.y)
+
+            def collide(self, actor, other, current, collisions, x, y):
+                found.append((actor, other, collisions))
+                return False
+
+        app = screen.run(App, 10, 10, frames=1)
+        self.assertEqual(found, [(app.dot, app.wall, [(5, 5)])])
+        self.assertEqual(app.dot.screenx, 1)
@@ -0,0 +1,69 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2012 Vishvananda Ishaya
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests for the jinxes sprite module
+"""
+
+import unittest
+
+from jinxes import sprite
+
+
+class FrameTestCase(unittest.TestCase):
+
+    def test_padding_and_opaque(self):
+        frame = sprite.Frame(['ab', '\0'], fg=3)
+        self.assertEqual((frame.width, frame.height), (2, 2))
+        self.assertEqual(frame.chars, ['a', 'b', '\0', '\0'])
+        self.assertEqual(frame.fgs, [3, 3, 3, None])
+        self.assertEqual(frame.opaque, ((0, 0), (1, 0)))
+
+    def test_update(self):
+        frame = sprite.Frame(['abc', 'def'], fg=3)
+        copy = frame.copy()
+        frame.resolved(4, 1, 2)
+        written, reshaped = frame.update(1, 1, ['XYZ'], fg=5)
+        self.assertEqual(written, [(1, 1), (2, 1)])
+        self.assertFalse(reshaped)
+        self.assertEqual(frame.get(1, 1), ('X', 5, None, False))
+        self.assertEqual(frame.resolved(4, 1, 2)[0], 'X')
+        self.assertEqual(copy.get(1, 1), ('e', 3, None, False))
+        written, reshaped = frame.update(0, 0, '\0')
+        self.assertTrue(reshaped)
+        self.assertEqual(frame.opaque[0], (1, 0))
+        self.assertEqual(len(copy.opaque), 6)
+
+    def test_get(self):
+        frame = sprite.Frame([['a', ('b', 1, 2, True)]], fg=3)
+        self.assertEqual(frame.get(0, 0), ('a', 3, None, False))
+        self.assertEqual(frame.get(1, 0), ('b', 1, 2, True))
+        self.assertEqual(frame.get(2, 0), None)
+        self.assertEqual(frame.get(0, -1), None)
+
+    def test_compile_frames(self):
+        frames = sprite.compile_frames(['x\ny', ['zz']])
+        self.assertEqual(len(frames), 2)
+        self.assertEqual(frames[0].lines(), [['x'], ['y']])
+        self.assertEqual(frames[1].opaque, ((0, 0), (1, 0)))
+        self.assertEqual(len(sprite.compile_frames('a')), 1)
+
+    def test_mask(self):
+        frame = sprite.Frame(['o'])
+        self.assertTrue(frame.mask(sprite.IDENTITY_KERNEL) is frame.opaque)
+        mask = frame.mask(sprite.PLUS_KERNEL)
+        self.assertEqual(mask, ((0, -1), (-1, 0), (0, 0), (1, 0), (0, 1)))
+        self.assertTrue(frame.mask(sprite.PLUS_KERNEL) is mask)